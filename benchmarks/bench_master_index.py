@@ -0,0 +1,163 @@
+"""
+Parse + filter benchmark for a full-quarter master.idx.
+
+Compares the previous text parser (frozen dataclass rows, eager dates,
+accession rebuilt from a Path on every access) with the current bytes parser,
+with and without the form filter pushed down into parsing, and a selection
+from the prebuilt memory-mapped columnar index.
+
+    PYTHONPATH=src python benchmarks/bench_master_index.py [--rows 350000] [--file master.idx]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterable, List
+
+from secfetch.index.columnar import ColumnarIndex, ensure_columnar_index
+from secfetch.index.filter import FilingFilter, filter_master_rows
+from secfetch.index.master import load_master_index
+
+_FORMS = ["4", "8-K", "10-Q", "SC 13G/A", "424B2", "D", "13F-HR", "S-1", "10-K", "6-K", "3", "497K"]
+
+
+def synthetic_master_idx(rows: int, seed: int = 7) -> bytes:
+    rnd = random.Random(seed)
+    out = [
+        "Description:           Master Index of EDGAR Dissemination Feed",
+        "Last Data Received:    March 31, 2024",
+        "",
+        "CIK|Company Name|Form Type|Date Filed|Filename",
+        "--------------------------------------------------------------------------------",
+    ]
+    for i in range(rows):
+        cik = rnd.randint(1000, 2_000_000)
+        form = rnd.choice(_FORMS)
+        day = date(2024, rnd.randint(1, 3), rnd.randint(1, 28)).isoformat()
+        acc = f"{cik:010d}-24-{i:06d}"
+        out.append(f"{cik}|COMPANY {cik} INC|{form}|{day}|edgar/data/{cik}/{acc}.txt")
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+
+# --- previous implementation, kept here as the baseline -------------------
+
+
+@dataclass(frozen=True)
+class _LegacyRow:
+    cik: str
+    company_name: str
+    form_type: str
+    date_filed: date
+    filename: str
+
+    @property
+    def accession(self) -> str:
+        name = Path(self.filename).name
+        return name.removesuffix(".txt").removesuffix(".idx")
+
+
+def _legacy_parse(lines: Iterable[str]) -> List[_LegacyRow]:
+    saw_header = False
+    in_data = False
+    rows: List[_LegacyRow] = []
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if not in_data:
+            if line.startswith("CIK|Company Name|Form Type|Date Filed|Filename"):
+                saw_header = True
+                continue
+            if saw_header and line.strip().startswith("----"):
+                in_data = True
+            continue
+        if not line.strip():
+            continue
+        cik, company_name, form_type, date_filed_str, filename = line.split("|")
+        yyyy, mm, dd = (int(x) for x in date_filed_str.split("-"))
+        rows.append(
+            _LegacyRow(
+                cik=cik.strip(),
+                company_name=company_name.strip(),
+                form_type=form_type.strip(),
+                date_filed=date(yyyy, mm, dd),
+                filename=filename.strip(),
+            )
+        )
+    return rows
+
+
+def _legacy_parse_and_filter(path: Path, flt: FilingFilter) -> int:
+    rows = _legacy_parse(path.read_text(errors="replace").splitlines())
+    seen: set[str] = set()
+    matched = []
+    for r in rows:
+        if r.accession in seen:
+            continue
+        seen.add(r.accession)
+        if flt.match(r):  # type: ignore[arg-type]
+            matched.append(r)
+    return len(matched)
+
+
+def _current_parse_and_filter(path: Path, flt: FilingFilter) -> int:
+    return len(filter_master_rows(load_master_index(path), flt))
+
+
+def _pushdown_parse_and_filter(path: Path, flt: FilingFilter) -> int:
+    return len(filter_master_rows(load_master_index(path, flt=flt), flt))
+
+
+def _columnar_select(col_path: Path, flt: FilingFilter) -> int:
+    with ColumnarIndex.open(col_path) as idx:
+        return len(filter_master_rows(idx.select(flt=flt), flt))
+
+
+def _best_of(n: int, fn: Callable[[], int]) -> tuple[float, int]:
+    best = float("inf")
+    result = 0
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=350_000)
+    ap.add_argument("--file", type=Path, default=None, help="use a real master.idx instead of synthetic data")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.file is not None:
+        path = args.file
+    else:
+        path = Path("bench_master.idx")
+        path.write_bytes(synthetic_master_idx(args.rows))
+
+    flt = FilingFilter(forms=["8-K"])
+    try:
+        legacy_s, legacy_n = _best_of(args.repeat, lambda: _legacy_parse_and_filter(path, flt))
+        current_s, current_n = _best_of(args.repeat, lambda: _current_parse_and_filter(path, flt))
+        pushdown_s, pushdown_n = _best_of(args.repeat, lambda: _pushdown_parse_and_filter(path, flt))
+        col_path = ensure_columnar_index(path)
+        columnar_s, columnar_n = _best_of(args.repeat, lambda: _columnar_select(col_path, flt))
+    finally:
+        if args.file is None:
+            path.unlink(missing_ok=True)
+            path.with_name("master.col").unlink(missing_ok=True)
+
+    assert legacy_n == current_n == pushdown_n == columnar_n, (legacy_n, current_n, pushdown_n, columnar_n)
+    print(f"matched rows : {current_n}")
+    print(f"legacy       : {legacy_s * 1000:8.1f} ms")
+    print(f"current      : {current_s * 1000:8.1f} ms  ({legacy_s / current_s:.1f}x faster)")
+    print(f"push-down    : {pushdown_s * 1000:8.1f} ms  ({legacy_s / pushdown_s:.1f}x faster)")
+    print(f"columnar     : {columnar_s * 1000:8.1f} ms  ({legacy_s / columnar_s:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,31 @@
-from secfetch.api import download_quarter, download_quarter_tar, download_year, download_year_tar
+from secfetch.api import (
+    build_quarter_indexes,
+    download_daily,
+    download_quarter,
+    download_quarter_tar,
+    download_range,
+    download_year,
+    download_year_tar,
+    migrate_layout,
+    plan_download,
+    query_catalog,
+    retry_deferred,
+)
 from secfetch.downloader import FilingDownloader
+from secfetch.index.retention import IndexRetention
 
 __all__ = [
     "FilingDownloader",
+    "IndexRetention",
+    "build_quarter_indexes",
+    "download_daily",
     "download_quarter",
     "download_quarter_tar",
+    "download_range",
     "download_year",
     "download_year_tar",
+    "migrate_layout",
+    "plan_download",
+    "query_catalog",
+    "retry_deferred",
 ]
@@ -2,22 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import os
+import shutil
 import sys
 import tarfile
-import shutil
 from datetime import date
 from pathlib import Path
-from typing import Callable, List, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence
 
 import httpx
 
-from secfetch.downloader import DownloadResult, FilingDownloader
+from secfetch.downloader import DownloadPlan, DownloadResult, FilingDownloader
 from secfetch.entities import resolve_cik_filter, resolve_output_group_label
 from secfetch.forms import load_accepted_form_types, validate_forms
+from secfetch.index.columnar import ensure_columnar_index, load_quarter_rows
 from secfetch.index.filter import FilingFilter, filter_master_rows
-from secfetch.index.master import MasterIndexRow, download_master_index, load_master_index
+from secfetch.index.master import MasterIndexRow, download_master_index, quarter_is_closed
+from secfetch.index.retention import IndexRetention, enforce_index_retention
 from secfetch.network.client import SecClient
-from secfetch.storage.layout import filing_dir
+from secfetch.storage.catalog import Catalog, CatalogEntry, catalog_path
+from secfetch.storage.layout import FilingLayout, filing_dir, load_layout
+from secfetch.storage.relayout import relayout
+from secfetch.storage.retry_queue import RetryQueue, retry_queue_path
 
 
 def _progress_bar(stage: str, current: int, total: int, extra: str = "") -> None:
@@ -85,11 +90,14 @@ async def _run_with_downloader(
     include_amended: bool,
     cik: Optional[str | int | Sequence[str | int]],
     ticker: Optional[str | Sequence[str]],
-    concurrency: int,
+    concurrency: int | str,
     user_agent: Optional[str],
     manifest_path: Optional[str | Path],
     output_format: str = "files",
     on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    index_retention: Optional[IndexRetention] = None,
+    listing_concurrency: Optional[int] = None,
+    dedup: bool = False,
 ) -> List[DownloadResult]:
     dl = FilingDownloader(
         forms=forms,
@@ -103,6 +111,9 @@ async def _run_with_downloader(
         manifest_path=manifest_path,
         output_format=output_format,
         on_progress=on_progress,
+        index_retention=index_retention,
+        listing_concurrency=listing_concurrency,
+        dedup=dedup,
     )
     try:
         return await runner(dl)
@@ -110,32 +121,72 @@ async def _run_with_downloader(
         await dl.aclose()
 
 
-async def _collect_matched_rows_for_quarter(
+async def _collect_matched_rows_for_quarters(
     *,
     year: int,
-    quarter: int,
+    quarters: Sequence[int],
     forms: Sequence[str],
     data_dir: Path,
     include_amended: bool,
     cik: Optional[str | int | Sequence[str | int]],
     ticker: Optional[str | Sequence[str]],
     user_agent: Optional[str],
-) -> tuple[List[MasterIndexRow], Path]:
+) -> List[MasterIndexRow]:
+    """
+    Matched rows for several quarters of one year, in quarter order and
+    de-duplicated by accession. All quarter indexes are fetched concurrently
+    over one client and parsed off the event loop.
+    """
     accepted = load_accepted_form_types(data_dir=data_dir)
     valid_forms = validate_forms(forms=forms, accepted=accepted)
+    flt = FilingFilter(forms=valid_forms, include_amended=include_amended)
+    cik_set = resolve_cik_filter(cik=cik, ticker=ticker)
     client = SecClient.from_env(user_agent=user_agent, data_dir=data_dir)
+
+    async def one(q: int) -> List[MasterIndexRow]:
+        master_path = await download_master_index(client, data_dir=data_dir, year=year, quarter=q)
+        rows = await asyncio.to_thread(
+            load_quarter_rows, master_path, flt=flt, cik_set=cik_set, build=quarter_is_closed(year=year, quarter=q)
+        )
+        return filter_master_rows(rows, flt)
+
     try:
-        master_path = await download_master_index(client, data_dir=data_dir, year=year, quarter=quarter)
-        rows = load_master_index(master_path)
-        flt = FilingFilter(forms=valid_forms, include_amended=include_amended)
-        matched = filter_master_rows(rows, flt)
-        cik_set = resolve_cik_filter(cik=cik, ticker=ticker)
-        if cik_set is not None:
-            matched = [r for r in matched if r.cik.zfill(10) in cik_set]
-        return matched, master_path
+        per_quarter = await asyncio.gather(*[one(int(q)) for q in quarters])
     finally:
         await client.aclose()
 
+    out: List[MasterIndexRow] = []
+    seen: set[str] = set()
+    for rows in per_quarter:
+        for r in rows:
+            if r.accession not in seen:
+                seen.add(r.accession)
+                out.append(r)
+    return out
+
+
+async def _collect_matched_rows_for_quarter(
+    *,
+    year: int,
+    quarter: int,
+    forms: Sequence[str],
+    data_dir: Path,
+    include_amended: bool,
+    cik: Optional[str | int | Sequence[str | int]],
+    ticker: Optional[str | Sequence[str]],
+    user_agent: Optional[str],
+) -> List[MasterIndexRow]:
+    return await _collect_matched_rows_for_quarters(
+        year=year,
+        quarters=[quarter],
+        forms=forms,
+        data_dir=data_dir,
+        include_amended=include_amended,
+        cik=cik,
+        ticker=ticker,
+        user_agent=user_agent,
+    )
+
 
 async def _collect_latest_row_for_company(
     *,
@@ -146,7 +197,10 @@ async def _collect_latest_row_for_company(
     client = SecClient.from_env(user_agent=user_agent, data_dir=data_dir)
     try:
         cik10 = str(int(str(cik).strip())).zfill(10)
-        payload = await client.get_json(f"https://data.sec.gov/submissions/CIK{cik10}.json")
+        payload = await client.get_json(
+            f"https://data.sec.gov/submissions/CIK{cik10}.json",
+            cache_path=data_dir / "index" / "submissions" / f"CIK{cik10}.json",
+        )
         filings = payload.get("filings", {})
         recent = filings.get("recent", {}) if isinstance(filings, dict) else {}
         acc = recent.get("accessionNumber", [])
@@ -180,7 +234,9 @@ async def _download_datamule_tars_async(
     api_key: Optional[str],
     show_progress: bool,
     concurrency: int,
+    extracted: Optional[Dict[str, Path]] = None,
 ) -> List[DownloadResult]:
+    """`extracted` maps accessions already unpacked under data/filings to their folder; those are skipped."""
     base_url = "https://sec-library.tar.datamule.xyz/"
     out_dir.mkdir(parents=True, exist_ok=True)
     key = api_key or os.getenv("DATAMULE_API_KEY")
@@ -189,7 +245,7 @@ async def _download_datamule_tars_async(
         headers["Authorization"] = f"Bearer {key}"
 
     total = len(rows)
-    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    workers = max(1, int(concurrency))
     progress_lock = asyncio.Lock()
     done = 0
     downloaded = 0
@@ -198,6 +254,10 @@ async def _download_datamule_tars_async(
     active = 0
     started_at = asyncio.get_event_loop().time()
 
+    extracted = extracted or {}
+    # One directory scan instead of a stat per row.
+    existing = {e.name for e in os.scandir(out_dir) if e.is_file()}
+
     def _render_progress(current_acc: str) -> None:
         _progress_bar("downloading tar files", done, total, f"{current_acc[:18]}")
 
@@ -206,7 +266,8 @@ async def _download_datamule_tars_async(
         acc_no_dash = r.accession.replace("-", "").zfill(18)
         tar_name = f"{acc_no_dash}.tar"
         tar_path = out_dir / tar_name
-        if tar_path.exists():
+        have = extracted.get(r.accession) or (tar_path if tar_name in existing else None)
+        if have is not None:
             async with progress_lock:
                 skipped += 1
                 done += 1
@@ -218,65 +279,118 @@ async def _download_datamule_tars_async(
                 form_type=r.form_type,
                 date_filed=r.date_filed,
                 status="skipped",
-                output_dir=str(tar_path),
+                output_dir=str(have),
             )
 
         url = base_url + tar_name
-        async with sem:
+        async with progress_lock:
+            active += 1
+            if show_progress:
+                _render_progress(r.accession)
+        try:
+            async with client.stream("GET", url) as resp:
+                resp.raise_for_status()
+                with tar_path.open("wb") as f:
+                    async for chunk in resp.aiter_bytes():
+                        if chunk:
+                            f.write(chunk)
+            result = DownloadResult(
+                accession=r.accession,
+                cik=r.cik,
+                form_type=r.form_type,
+                date_filed=r.date_filed,
+                status="downloaded",
+                output_dir=str(tar_path),
+            )
             async with progress_lock:
-                active += 1
-                if show_progress:
-                    _render_progress(r.accession)
+                downloaded += 1
+        except Exception as e:
             try:
-                async with client.stream("GET", url) as resp:
-                    resp.raise_for_status()
-                    with tar_path.open("wb") as f:
-                        async for chunk in resp.aiter_bytes():
-                            if chunk:
-                                f.write(chunk)
-                result = DownloadResult(
-                    accession=r.accession,
-                    cik=r.cik,
-                    form_type=r.form_type,
-                    date_filed=r.date_filed,
-                    status="downloaded",
-                    output_dir=str(tar_path),
-                )
-                async with progress_lock:
-                    downloaded += 1
-            except Exception as e:
-                try:
-                    if tar_path.exists():
-                        tar_path.unlink()
-                except Exception:
-                    pass
-                result = DownloadResult(
-                    accession=r.accession,
-                    cik=r.cik,
-                    form_type=r.form_type,
-                    date_filed=r.date_filed,
-                    status="error",
-                    error=str(e),
-                    output_dir=str(tar_path),
-                )
-                async with progress_lock:
-                    errors += 1
-            finally:
-                async with progress_lock:
-                    active = max(0, active - 1)
+                if tar_path.exists():
+                    tar_path.unlink()
+            except Exception:
+                pass
+            result = DownloadResult(
+                accession=r.accession,
+                cik=r.cik,
+                form_type=r.form_type,
+                date_filed=r.date_filed,
+                status="error",
+                error=str(e),
+                output_dir=str(tar_path),
+            )
+            async with progress_lock:
+                errors += 1
+        finally:
+            async with progress_lock:
+                active = max(0, active - 1)
         async with progress_lock:
             done += 1
             if show_progress:
                 _render_progress(r.accession)
         return result
 
+    # Fixed worker pool over a bounded queue: only `workers` downloads (plus a
+    # small buffer) are pending at any time, however many rows matched.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    results: List[Optional[DownloadResult]] = [None] * total
+
+    async def produce() -> None:
+        try:
+            for i, r in enumerate(rows):
+                await queue.put((i, r))
+        finally:
+            for _ in range(workers):
+                await queue.put(None)
+
+    async def work() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            i, r = item
+            results[i] = await one(r)
+
     async with httpx.AsyncClient(follow_redirects=True, timeout=120.0, headers=headers) as client:
-        results = await asyncio.gather(*[one(r) for r in rows])
+        tasks = [asyncio.create_task(produce())] + [asyncio.create_task(work()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
 
     if show_progress and total > 0:
         _progress_bar("downloading tar files", total, total, "")
         _step_done(f"downloaded={downloaded} skipped={skipped} errors={errors}")
-    return results
+    return [r for r in results if r is not None]
+
+
+def _extracted_filings(
+    rows: Sequence[MasterIndexRow], *, data_dir: Path, group_label: Optional[str]
+) -> Dict[str, Path]:
+    """Accessions already extracted under data/filings, listing each parent folder once."""
+    layout = load_layout(data_dir)
+    listed: Dict[Path, set] = {}
+    out: Dict[str, Path] = {}
+    for r in rows:
+        dest = filing_dir(
+            data_dir=data_dir,
+            form_type=r.form_type,
+            cik=r.cik,
+            accession=r.accession,
+            group_label=group_label,
+            layout=layout,
+        )
+        names = listed.get(dest.parent)
+        if names is None:
+            try:
+                names = {e.name for e in os.scandir(dest.parent) if e.is_dir()}
+            except FileNotFoundError:
+                names = set()
+            listed[dest.parent] = names
+        if dest.name in names:
+            out[r.accession] = dest
+    return out
 
 
 def _safe_extract_tar_to_accession(*, tar_path: Path, target_dir: Path, accession: str) -> None:
@@ -314,60 +428,80 @@ def _extract_and_cleanup_datamule_tars(
     tar_dir: Path,
     show_progress: bool,
     group_label: Optional[str],
+    manifest_path: Optional[str | Path] = None,
 ) -> List[DownloadResult]:
+    layout = load_layout(data_dir)
+    catalog = Catalog(catalog_path(data_dir, Path(manifest_path) if manifest_path else None))
     updated: List[DownloadResult] = []
     candidates = [r for r in results if r.status != "error" and r.output_dir and Path(r.output_dir).suffix.lower() == ".tar"]
     total = len(candidates)
     done = 0
-    for r in results:
-        if r.status == "error" or not r.output_dir:
-            updated.append(r)
-            continue
-        tar_path = Path(r.output_dir)
-        if not tar_path.exists() or tar_path.suffix.lower() != ".tar":
-            updated.append(r)
-            continue
-        dest = filing_dir(
-            data_dir=data_dir,
-            form_type=r.form_type,
-            cik=r.cik,
-            accession=r.accession,
-            group_label=group_label,
-        )
-        try:
-            if dest.exists():
-                shutil.rmtree(dest)
-            _safe_extract_tar_to_accession(tar_path=tar_path, target_dir=dest, accession=r.accession)
-            tar_path.unlink(missing_ok=True)
-            done += 1
-            if show_progress and total > 0:
-                _progress_bar("extracting filings", done, total, r.accession)
-            updated.append(
-                DownloadResult(
-                    accession=r.accession,
-                    cik=r.cik,
-                    form_type=r.form_type,
-                    date_filed=r.date_filed,
-                    status=r.status,
-                    error=r.error,
-                    output_dir=str(dest),
-                )
+    try:
+        for r in results:
+            if r.status == "error" or not r.output_dir:
+                updated.append(r)
+                continue
+            tar_path = Path(r.output_dir)
+            if not tar_path.exists() or tar_path.suffix.lower() != ".tar":
+                updated.append(r)
+                continue
+            dest = filing_dir(
+                data_dir=data_dir,
+                form_type=r.form_type,
+                cik=r.cik,
+                accession=r.accession,
+                group_label=group_label,
+                layout=layout,
             )
-        except Exception as e:
-            done += 1
-            if show_progress and total > 0:
-                _progress_bar("extracting filings", done, total, r.accession)
-            updated.append(
-                DownloadResult(
-                    accession=r.accession,
-                    cik=r.cik,
-                    form_type=r.form_type,
-                    date_filed=r.date_filed,
-                    status="error",
-                    error=str(e),
-                    output_dir=str(dest),
+            try:
+                if dest.exists():
+                    shutil.rmtree(dest)
+                _safe_extract_tar_to_accession(tar_path=tar_path, target_dir=dest, accession=r.accession)
+                tar_path.unlink(missing_ok=True)
+                catalog.record(
+                    CatalogEntry(
+                        accession=r.accession,
+                        cik=r.cik.zfill(10),
+                        form_type=r.form_type,
+                        date_filed=r.date_filed.isoformat(),
+                        output_format="files",
+                        output_path=str(dest),
+                        files=tuple(
+                            sorted((p.relative_to(dest).as_posix(), p.stat().st_size) for p in dest.rglob("*") if p.is_file())
+                        ),
+                    )
                 )
-            )
+                done += 1
+                if show_progress and total > 0:
+                    _progress_bar("extracting filings", done, total, r.accession)
+                updated.append(
+                    DownloadResult(
+                        accession=r.accession,
+                        cik=r.cik,
+                        form_type=r.form_type,
+                        date_filed=r.date_filed,
+                        status=r.status,
+                        error=r.error,
+                        output_dir=str(dest),
+                    )
+                )
+            except Exception as e:
+                done += 1
+                if show_progress and total > 0:
+                    _progress_bar("extracting filings", done, total, r.accession)
+                updated.append(
+                    DownloadResult(
+                        accession=r.accession,
+                        cik=r.cik,
+                        form_type=r.form_type,
+                        date_filed=r.date_filed,
+                        status="error",
+                        error=str(e),
+                        output_dir=str(dest),
+                    )
+                )
+    finally:
+        catalog.close()
     shutil.rmtree(tar_dir, ignore_errors=True)
     return updated
 
@@ -382,11 +516,14 @@ def download_quarter(
     include_amended: bool = False,
     cik: Optional[str | int | Sequence[str | int]] = None,
     ticker: Optional[str | Sequence[str]] = None,
-    concurrency: int = 6,
+    concurrency: int | str = 6,
     user_agent: Optional[str] = None,
     manifest_path: Optional[str | Path] = None,
     show_progress: bool = True,
     on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    index_retention: Optional[IndexRetention] = None,
+    listing_concurrency: Optional[int] = None,
+    dedup: bool = False,
 ) -> List[DownloadResult]:
     latest_mode = year is None and quarter is None and forms is None
     if latest_mode and cik is None and ticker is None:
@@ -423,7 +560,7 @@ def download_quarter(
 
         async def _run_latest() -> List[DownloadResult]:
             return await _run_with_downloader(
-                runner=lambda dl: dl._download_one(row=latest_row),
+                runner=lambda dl: dl._download_rows([latest_row]),
                 forms=[latest_row.form_type or "8-K"],
                 data_dir=data_dir,
                 file_types=file_types,
@@ -434,6 +571,9 @@ def download_quarter(
                 user_agent=user_agent,
                 manifest_path=manifest_path,
                 on_progress=progress_cb,
+                index_retention=index_retention,
+                listing_concurrency=listing_concurrency,
+                dedup=dedup,
             )
 
         return asyncio.run(_run_latest())
@@ -451,6 +591,9 @@ def download_quarter(
             user_agent=user_agent,
             manifest_path=manifest_path,
             on_progress=progress_cb,
+            index_retention=index_retention,
+            listing_concurrency=listing_concurrency,
+            dedup=dedup,
         )
 
     return asyncio.run(_run())
@@ -476,6 +619,8 @@ def download_quarter_tar(
     extract: bool = True,
     show_progress: bool = True,
     on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    index_retention: Optional[IndexRetention] = None,
+    listing_concurrency: Optional[int] = None,
 ) -> List[DownloadResult]:
     latest_mode = year is None and quarter is None and forms is None
     if latest_mode and cik is None and ticker is None:
@@ -514,6 +659,8 @@ def download_quarter_tar(
                 manifest_path=manifest_path,
                 output_format="tar",
                 on_progress=progress_cb,
+                index_retention=index_retention,
+                listing_concurrency=listing_concurrency,
             )
 
         return asyncio.run(_run_local())
@@ -536,9 +683,8 @@ def download_quarter_tar(
             )
         )
         rows = [latest_row] if latest_row is not None else []
-        master_path = None
     else:
-        rows, master_path = asyncio.run(
+        rows = asyncio.run(
             _collect_matched_rows_for_quarter(
                 year=int(year),
                 quarter=int(quarter),
@@ -573,6 +719,7 @@ def download_quarter_tar(
             api_key=datamule_api_key,
             show_progress=show_progress,
             concurrency=concurrency,
+            extracted=_extracted_filings(rows, data_dir=data_dir_path, group_label=group_label) if extract else None,
         )
     )
     if extract:
@@ -582,17 +729,11 @@ def download_quarter_tar(
             tar_dir=out_dir,
             show_progress=show_progress,
             group_label=group_label,
+            manifest_path=manifest_path,
         )
 
-    # Match existing quarter behavior: clear quarter index cache when run completes.
-    if master_path is not None:
-        try:
-            if master_path.parent.exists():
-                import shutil
-
-                shutil.rmtree(master_path.parent)
-        except Exception:
-            pass
+    if not latest_mode:
+        enforce_index_retention(data_dir_path, index_retention or IndexRetention())
 
     return results
 
@@ -606,12 +747,15 @@ def download_year(
     include_amended: bool = False,
     cik: Optional[str | int | Sequence[str | int]] = None,
     ticker: Optional[str | Sequence[str]] = None,
-    concurrency: int = 6,
+    concurrency: int | str = 6,
     user_agent: Optional[str] = None,
     manifest_path: Optional[str | Path] = None,
     quarters: Sequence[int] = (1, 2, 3, 4),
     show_progress: bool = True,
     on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    index_retention: Optional[IndexRetention] = None,
+    listing_concurrency: Optional[int] = None,
+    dedup: bool = False,
 ) -> List[DownloadResult]:
     if show_progress:
         _step_info(
@@ -633,6 +777,205 @@ def download_year(
             user_agent=user_agent,
             manifest_path=manifest_path,
             on_progress=progress_cb,
+            index_retention=index_retention,
+            listing_concurrency=listing_concurrency,
+            dedup=dedup,
+        )
+
+    return asyncio.run(_run())
+
+
+def download_daily(
+    *,
+    forms: Sequence[str],
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    data_dir: str | Path = "data",
+    file_types: Sequence[str] = (".htm", ".html", ".xml", ".xbrl", ".pdf"),
+    include_amended: bool = False,
+    cik: Optional[str | int | Sequence[str | int]] = None,
+    ticker: Optional[str | Sequence[str]] = None,
+    concurrency: int | str = 6,
+    user_agent: Optional[str] = None,
+    manifest_path: Optional[str | Path] = None,
+    show_progress: bool = True,
+    on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    listing_concurrency: Optional[int] = None,
+    dedup: bool = False,
+) -> List[DownloadResult]:
+    """
+    Download filings published since the last daily sync (or since `since`),
+    reading only the EDGAR daily index files for those days.
+    """
+    if show_progress:
+        _step_info(
+            f"daily download since={since.isoformat() if since else 'last sync'} "
+            + _render_filter_label(forms=forms, cik=cik, ticker=ticker)
+        )
+    progress_cb = on_progress if on_progress is not None else (_default_progress_callback if show_progress else None)
+
+    async def _run() -> List[DownloadResult]:
+        return await _run_with_downloader(
+            runner=lambda dl: dl.download_daily(since=since, until=until),
+            forms=forms,
+            data_dir=data_dir,
+            file_types=file_types,
+            include_amended=include_amended,
+            cik=cik,
+            ticker=ticker,
+            concurrency=concurrency,
+            user_agent=user_agent,
+            manifest_path=manifest_path,
+            on_progress=progress_cb,
+            listing_concurrency=listing_concurrency,
+            dedup=dedup,
+        )
+
+    return asyncio.run(_run())
+
+
+def download_range(
+    *,
+    start: date | str,
+    end: date | str,
+    forms: Sequence[str],
+    data_dir: str | Path = "data",
+    file_types: Sequence[str] = (".htm", ".html", ".xml", ".xbrl", ".pdf"),
+    include_amended: bool = False,
+    cik: Optional[str | int | Sequence[str | int]] = None,
+    ticker: Optional[str | Sequence[str]] = None,
+    concurrency: int | str = 6,
+    user_agent: Optional[str] = None,
+    manifest_path: Optional[str | Path] = None,
+    show_progress: bool = True,
+    on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    index_retention: Optional[IndexRetention] = None,
+    listing_concurrency: Optional[int] = None,
+    dedup: bool = False,
+) -> List[DownloadResult]:
+    """
+    Download filings filed between `start` and `end` (inclusive, dates or YYYY-MM-DD).
+
+    Only the quarterly / daily index files covering the window are fetched,
+    concurrently on one client, and all matches share one download pipeline.
+    """
+    start_d = date.fromisoformat(start) if isinstance(start, str) else start
+    end_d = date.fromisoformat(end) if isinstance(end, str) else end
+    if start_d > end_d:
+        raise ValueError("start must be on or before end")
+    if show_progress:
+        _step_info(
+            f"range download start={start_d.isoformat()} end={end_d.isoformat()} "
+            + _render_filter_label(forms=forms, cik=cik, ticker=ticker)
+        )
+    progress_cb = on_progress if on_progress is not None else (_default_progress_callback if show_progress else None)
+
+    async def _run() -> List[DownloadResult]:
+        return await _run_with_downloader(
+            runner=lambda dl: dl.download_range(start=start_d, end=end_d),
+            forms=forms,
+            data_dir=data_dir,
+            file_types=file_types,
+            include_amended=include_amended,
+            cik=cik,
+            ticker=ticker,
+            concurrency=concurrency,
+            user_agent=user_agent,
+            manifest_path=manifest_path,
+            on_progress=progress_cb,
+            index_retention=index_retention,
+            listing_concurrency=listing_concurrency,
+            dedup=dedup,
+        )
+
+    return asyncio.run(_run())
+
+
+def plan_download(
+    *,
+    year: int,
+    forms: Sequence[str],
+    quarters: Sequence[int] = (1, 2, 3, 4),
+    data_dir: str | Path = "data",
+    file_types: Sequence[str] = (".htm", ".html", ".xml", ".xbrl", ".pdf"),
+    include_amended: bool = False,
+    cik: Optional[str | int | Sequence[str | int]] = None,
+    ticker: Optional[str | Sequence[str]] = None,
+    user_agent: Optional[str] = None,
+    manifest_path: Optional[str | Path] = None,
+    output_format: str = "files",
+) -> DownloadPlan:
+    """
+    Dry run for `download_quarter` / `download_year`: which filings would be
+    fetched and which are already on disk, without requesting any filing.
+
+    Only the quarter indexes are fetched (and only when not cached); sizes
+    come from listings cached by earlier runs.
+    """
+    dl = FilingDownloader(
+        forms=forms,
+        data_dir=data_dir,
+        file_types=file_types,
+        include_amended=include_amended,
+        cik=cik,
+        ticker=ticker,
+        user_agent=user_agent,
+        manifest_path=manifest_path,
+        output_format=output_format,
+    )
+
+    async def _run() -> DownloadPlan:
+        try:
+            return await dl.plan_quarters(year=year, quarters=quarters)
+        finally:
+            await dl.aclose()
+
+    return asyncio.run(_run())
+
+
+def retry_deferred(
+    *,
+    data_dir: str | Path = "data",
+    file_types: Sequence[str] = (".htm", ".html", ".xml", ".xbrl", ".pdf"),
+    cik: Optional[str | int | Sequence[str | int]] = None,
+    ticker: Optional[str | Sequence[str]] = None,
+    concurrency: int | str = 6,
+    user_agent: Optional[str] = None,
+    manifest_path: Optional[str | Path] = None,
+    show_progress: bool = True,
+    on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    listing_concurrency: Optional[int] = None,
+    dedup: bool = False,
+) -> List[DownloadResult]:
+    """
+    Retry the filings earlier runs deferred after repeated 429/5xx responses
+    (data/_state/retry.json). Pass the same `cik` / `ticker` as the original
+    run so filings land in the same output folders.
+    """
+    queue = RetryQueue(retry_queue_path(Path(data_dir)))
+    queue.load()
+    forms = sorted({d.form_type for d in queue.entries()})
+    if not forms:
+        return []
+    if show_progress:
+        _step_info(f"retrying {len(queue)} deferred filings")
+    progress_cb = on_progress if on_progress is not None else (_default_progress_callback if show_progress else None)
+
+    async def _run() -> List[DownloadResult]:
+        return await _run_with_downloader(
+            runner=lambda dl: dl.retry_deferred(),
+            forms=forms,
+            data_dir=data_dir,
+            file_types=file_types,
+            include_amended=True,
+            cik=cik,
+            ticker=ticker,
+            concurrency=concurrency,
+            user_agent=user_agent,
+            manifest_path=manifest_path,
+            on_progress=progress_cb,
+            listing_concurrency=listing_concurrency,
+            dedup=dedup,
         )
 
     return asyncio.run(_run())
@@ -658,6 +1001,8 @@ def download_year_tar(
     extract: bool = True,
     show_progress: bool = True,
     on_progress: Optional[Callable[[int, int, Optional[DownloadResult], int], None]] = None,
+    index_retention: Optional[IndexRetention] = None,
+    listing_concurrency: Optional[int] = None,
 ) -> List[DownloadResult]:
     if show_progress:
         _step_info(
@@ -681,6 +1026,8 @@ def download_year_tar(
                 manifest_path=manifest_path,
                 output_format="tar",
                 on_progress=progress_cb,
+                index_retention=index_retention,
+                listing_concurrency=listing_concurrency,
             )
 
         return asyncio.run(_run_local())
@@ -688,31 +1035,134 @@ def download_year_tar(
     if tar_provider != "datamule":
         raise ValueError("tar_provider must be 'datamule' or 'local'")
 
-    out: List[DownloadResult] = []
-    for q in quarters:
-        remaining = None if limit is None else max(0, int(limit) - len(out))
-        if remaining == 0:
-            break
-        out.extend(
-            download_quarter_tar(
-                year=year,
-                quarter=int(q),
-                forms=forms,
-                data_dir=data_dir,
-                file_types=file_types,
-                include_amended=include_amended,
-                cik=cik,
-                ticker=ticker,
-                concurrency=concurrency,
-                user_agent=user_agent,
-                manifest_path=manifest_path,
-                output_dir=output_dir,
-                datamule_api_key=datamule_api_key,
-                tar_provider="datamule",
-                limit=remaining,
-                extract=extract,
-                show_progress=show_progress,
-                on_progress=on_progress,
-            )
+    # One event loop for the whole year: quarter indexes are fetched together,
+    # then every quarter's tars share one pooled client and one concurrency limit.
+    data_dir_path = Path(data_dir)
+    group_label = resolve_output_group_label(cik=cik, ticker=ticker)
+    out_dir = Path(output_dir) if output_dir is not None else (data_dir_path / "filings_tar")
+    if limit is not None and int(limit) <= 0:
+        return []
+
+    async def _run() -> List[DownloadResult]:
+        rows = await _collect_matched_rows_for_quarters(
+            year=year,
+            quarters=quarters,
+            forms=forms,
+            data_dir=data_dir_path,
+            include_amended=include_amended,
+            cik=cik,
+            ticker=ticker,
+            user_agent=user_agent,
         )
-    return out
+        if limit is not None:
+            rows = rows[: int(limit)]
+        if not rows:
+            return []
+        if show_progress:
+            _step_done(f"queued {len(rows)} filings across {len(quarters)} quarters")
+        return await _download_datamule_tars_async(
+            rows=rows,
+            out_dir=out_dir,
+            api_key=datamule_api_key,
+            show_progress=show_progress,
+            concurrency=concurrency,
+            extracted=_extracted_filings(rows, data_dir=data_dir_path, group_label=group_label) if extract else None,
+        )
+
+    results = asyncio.run(_run())
+    if extract and results:
+        results = _extract_and_cleanup_datamule_tars(
+            results=results,
+            data_dir=data_dir_path,
+            tar_dir=out_dir,
+            show_progress=show_progress,
+            group_label=group_label,
+            manifest_path=manifest_path,
+        )
+    enforce_index_retention(data_dir_path, index_retention or IndexRetention())
+    return results
+
+
+def query_catalog(
+    *,
+    data_dir: str | Path = "data",
+    forms: Optional[Sequence[str]] = None,
+    cik: Optional[str | int | Sequence[str | int]] = None,
+    ticker: Optional[str | Sequence[str]] = None,
+    start: Optional[date | str] = None,
+    end: Optional[date | str] = None,
+    output_format: Optional[str] = None,
+    manifest_path: Optional[str | Path] = None,
+) -> List[CatalogEntry]:
+    """
+    Filings already downloaded under `data_dir`, from the local catalog.
+
+    Answers e.g. "which 10-Qs for these CIKs do we have between these dates"
+    without walking data/filings. Dates are inclusive (dates or YYYY-MM-DD).
+    """
+    catalog = Catalog(catalog_path(Path(data_dir), Path(manifest_path) if manifest_path else None))
+    try:
+        return catalog.query(
+            forms=forms,
+            ciks=resolve_cik_filter(cik=cik, ticker=ticker),
+            start=date.fromisoformat(start) if isinstance(start, str) else start,
+            end=date.fromisoformat(end) if isinstance(end, str) else end,
+            output_format=output_format,
+        )
+    finally:
+        catalog.close()
+
+
+def migrate_layout(
+    *,
+    data_dir: str | Path = "data",
+    fanout: int,
+    width: int = 2,
+    manifest_path: Optional[str | Path] = None,
+) -> int:
+    """
+    Move the filings under `data_dir` into a hash-fanned layout, in place.
+
+    `fanout` levels of `width` hex characters go between each form/group
+    folder and its filings; `fanout=0` converts back to the flat layout.
+    Later downloads, extraction and skip checks follow the recorded layout.
+    Run it while no download is using `data_dir`; an interrupted run is
+    finished by running it again. Returns the number of entries moved.
+    """
+    layout = FilingLayout(fanout=int(fanout), width=int(width))
+    catalog = Catalog(catalog_path(Path(data_dir), Path(manifest_path) if manifest_path else None))
+    try:
+        return relayout(Path(data_dir), layout, catalog=catalog)
+    finally:
+        catalog.close()
+
+
+def build_quarter_indexes(
+    *,
+    year: int,
+    quarters: Sequence[int] = (1, 2, 3, 4),
+    data_dir: str | Path = "data",
+    user_agent: Optional[str] = None,
+    force: bool = False,
+) -> List[Path]:
+    """
+    Download each quarter's master.idx and build its memory-mapped columnar index
+    (`master.col`). Later selections over these quarters skip text parsing.
+    Returns the columnar index paths.
+    """
+    data_dir_path = Path(data_dir)
+
+    async def _run() -> List[Path]:
+        client = SecClient.from_env(user_agent=user_agent, data_dir=data_dir_path)
+        try:
+            paths = await asyncio.gather(
+                *[
+                    download_master_index(client, data_dir=data_dir_path, year=year, quarter=int(q), force=force)
+                    for q in quarters
+                ]
+            )
+        finally:
+            await client.aclose()
+        return list(paths)
+
+    return [ensure_columnar_index(p, force=force) for p in asyncio.run(_run())]
@@ -3,8 +3,19 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+from datetime import date
 
-from secfetch import download_quarter, download_year
+from secfetch import (
+    build_quarter_indexes,
+    download_daily,
+    download_quarter,
+    download_range,
+    download_year,
+    migrate_layout,
+    plan_download,
+    query_catalog,
+    retry_deferred,
+)
 from secfetch.downloader import DownloadResult
 
 # Spinner chars for loading style (cycle per completion)
@@ -32,6 +43,15 @@ def _progress_callback(
     sys.stderr.flush()
 
 
+def _concurrency(value: str) -> int | str:
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected an integer or 'auto'") from None
+
+
 def main(argv: list[str] | None = None) -> int:
     p = argparse.ArgumentParser(prog="secfetch")
     sub = p.add_subparsers(dest="cmd", required=True)
@@ -45,8 +65,11 @@ def main(argv: list[str] | None = None) -> int:
     q.add_argument("--data-dir", default="data")
     q.add_argument("--file-types", nargs="+", default=[".htm", ".html", ".xml", ".xbrl", ".pdf"])
     q.add_argument("--include-amended", action="store_true")
-    q.add_argument("--concurrency", type=int, default=6)
+    q.add_argument("--concurrency", type=_concurrency, default=6, help="file downloads in flight, or 'auto'")
+    q.add_argument("--listing-concurrency", type=int, default=None, help="index.json fetches in flight (default: --concurrency)")
     q.add_argument("--user-agent", default=None)
+    q.add_argument("--dedup", action="store_true", help="store identical documents once (hardlinks into data/_blobs)")
+    q.add_argument("--dry-run", action="store_true", help="print what would be fetched and exit")
 
     y = sub.add_parser("year", help="Download filings for a year (all quarters)")
     y.add_argument("--year", type=int, required=True)
@@ -56,11 +79,115 @@ def main(argv: list[str] | None = None) -> int:
     y.add_argument("--data-dir", default="data")
     y.add_argument("--file-types", nargs="+", default=[".htm", ".html", ".xml", ".xbrl", ".pdf"])
     y.add_argument("--include-amended", action="store_true")
-    y.add_argument("--concurrency", type=int, default=6)
+    y.add_argument("--concurrency", type=_concurrency, default=6, help="file downloads in flight, or 'auto'")
+    y.add_argument("--listing-concurrency", type=int, default=None, help="index.json fetches in flight (default: --concurrency)")
     y.add_argument("--user-agent", default=None)
+    y.add_argument("--dedup", action="store_true", help="store identical documents once (hardlinks into data/_blobs)")
+    y.add_argument("--dry-run", action="store_true", help="print what would be fetched and exit")
+
+    r = sub.add_parser("range", help="Download filings filed between two dates")
+    r.add_argument("--start", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    r.add_argument("--end", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    r.add_argument("--forms", nargs="+", required=True)
+    r.add_argument("--cik", nargs="+", default=None)
+    r.add_argument("--ticker", nargs="+", default=None)
+    r.add_argument("--data-dir", default="data")
+    r.add_argument("--file-types", nargs="+", default=[".htm", ".html", ".xml", ".xbrl", ".pdf"])
+    r.add_argument("--include-amended", action="store_true")
+    r.add_argument("--concurrency", type=_concurrency, default=6, help="file downloads in flight, or 'auto'")
+    r.add_argument("--listing-concurrency", type=int, default=None, help="index.json fetches in flight (default: --concurrency)")
+    r.add_argument("--user-agent", default=None)
+    r.add_argument("--dedup", action="store_true", help="store identical documents once (hardlinks into data/_blobs)")
+
+    d = sub.add_parser("daily", help="Download filings published since the last daily sync")
+    d.add_argument("--forms", nargs="+", required=True)
+    d.add_argument("--since", type=date.fromisoformat, default=None, help="YYYY-MM-DD (default: last sync point)")
+    d.add_argument("--cik", nargs="+", default=None)
+    d.add_argument("--ticker", nargs="+", default=None)
+    d.add_argument("--data-dir", default="data")
+    d.add_argument("--file-types", nargs="+", default=[".htm", ".html", ".xml", ".xbrl", ".pdf"])
+    d.add_argument("--include-amended", action="store_true")
+    d.add_argument("--concurrency", type=_concurrency, default=6, help="file downloads in flight, or 'auto'")
+    d.add_argument("--listing-concurrency", type=int, default=None, help="index.json fetches in flight (default: --concurrency)")
+    d.add_argument("--user-agent", default=None)
+    d.add_argument("--dedup", action="store_true", help="store identical documents once (hardlinks into data/_blobs)")
+
+    rt = sub.add_parser("retry", help="Retry filings deferred by earlier runs after repeated 429/5xx responses")
+    rt.add_argument("--cik", nargs="+", default=None)
+    rt.add_argument("--ticker", nargs="+", default=None)
+    rt.add_argument("--data-dir", default="data")
+    rt.add_argument("--file-types", nargs="+", default=[".htm", ".html", ".xml", ".xbrl", ".pdf"])
+    rt.add_argument("--concurrency", type=_concurrency, default=6, help="file downloads in flight, or 'auto'")
+    rt.add_argument("--user-agent", default=None)
+    rt.add_argument("--dedup", action="store_true", help="store identical documents once (hardlinks into data/_blobs)")
+
+    cat = sub.add_parser("catalog", help="List downloaded filings from the local catalog")
+    cat.add_argument("--forms", nargs="+", default=None)
+    cat.add_argument("--cik", nargs="+", default=None)
+    cat.add_argument("--ticker", nargs="+", default=None)
+    cat.add_argument("--start", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    cat.add_argument("--end", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    cat.add_argument("--format", dest="output_format", choices=["files", "tar"], default=None)
+    cat.add_argument("--data-dir", default="data")
+
+    lay = sub.add_parser("layout", help="Convert downloaded filings to a hash-fanned folder layout, in place")
+    lay.add_argument("--fanout", type=int, required=True, help="hash levels per form/group folder (0 = flat)")
+    lay.add_argument("--width", type=int, default=2, help="hex characters per level")
+    lay.add_argument("--data-dir", default="data")
+
+    ix = sub.add_parser("index", help="Download master indexes and build columnar index files")
+    ix.add_argument("--year", type=int, required=True)
+    ix.add_argument("--quarters", type=int, nargs="+", default=[1, 2, 3, 4], choices=[1, 2, 3, 4])
+    ix.add_argument("--data-dir", default="data")
+    ix.add_argument("--user-agent", default=None)
+    ix.add_argument("--force", action="store_true")
 
     args = p.parse_args(argv)
 
+    if args.cmd == "index":
+        paths = build_quarter_indexes(
+            year=args.year,
+            quarters=args.quarters,
+            data_dir=args.data_dir,
+            user_agent=args.user_agent,
+            force=args.force,
+        )
+        print(json.dumps([str(x) for x in paths], indent=2))
+        return 0
+
+    if args.cmd == "layout":
+        moved = migrate_layout(data_dir=args.data_dir, fanout=args.fanout, width=args.width)
+        print(json.dumps({"moved": moved, "fanout": args.fanout, "width": args.width}, indent=2))
+        return 0
+
+    if args.cmd == "catalog":
+        entries = query_catalog(
+            data_dir=args.data_dir,
+            forms=args.forms,
+            cik=args.cik,
+            ticker=args.ticker,
+            start=args.start,
+            end=args.end,
+            output_format=args.output_format,
+        )
+        print(json.dumps([dict(e.__dict__, total_bytes=e.total_bytes) for e in entries], indent=2))
+        return 0
+
+    if args.cmd in ("quarter", "year") and args.dry_run:
+        plan = plan_download(
+            year=args.year,
+            quarters=[args.quarter] if args.cmd == "quarter" else [1, 2, 3, 4],
+            forms=args.forms,
+            cik=args.cik,
+            ticker=args.ticker,
+            data_dir=args.data_dir,
+            file_types=args.file_types,
+            include_amended=args.include_amended,
+            user_agent=args.user_agent,
+        )
+        print(json.dumps(plan.summary(), indent=2))
+        return 0
+
     try:
         if args.cmd == "quarter":
             res = download_quarter(
@@ -73,7 +200,51 @@ def main(argv: list[str] | None = None) -> int:
                 file_types=args.file_types,
                 include_amended=args.include_amended,
                 concurrency=args.concurrency,
+                listing_concurrency=args.listing_concurrency,
+                user_agent=args.user_agent,
+                dedup=args.dedup,
+                on_progress=_progress_callback,
+            )
+        elif args.cmd == "range":
+            res = download_range(
+                start=args.start,
+                end=args.end,
+                forms=args.forms,
+                cik=args.cik,
+                ticker=args.ticker,
+                data_dir=args.data_dir,
+                file_types=args.file_types,
+                include_amended=args.include_amended,
+                concurrency=args.concurrency,
+                listing_concurrency=args.listing_concurrency,
+                user_agent=args.user_agent,
+                dedup=args.dedup,
+                on_progress=_progress_callback,
+            )
+        elif args.cmd == "retry":
+            res = retry_deferred(
+                cik=args.cik,
+                ticker=args.ticker,
+                data_dir=args.data_dir,
+                file_types=args.file_types,
+                concurrency=args.concurrency,
+                user_agent=args.user_agent,
+                dedup=args.dedup,
+                on_progress=_progress_callback,
+            )
+        elif args.cmd == "daily":
+            res = download_daily(
+                forms=args.forms,
+                since=args.since,
+                cik=args.cik,
+                ticker=args.ticker,
+                data_dir=args.data_dir,
+                file_types=args.file_types,
+                include_amended=args.include_amended,
+                concurrency=args.concurrency,
+                listing_concurrency=args.listing_concurrency,
                 user_agent=args.user_agent,
+                dedup=args.dedup,
                 on_progress=_progress_callback,
             )
         else:
@@ -86,7 +257,9 @@ def main(argv: list[str] | None = None) -> int:
                 file_types=args.file_types,
                 include_amended=args.include_amended,
                 concurrency=args.concurrency,
+                listing_concurrency=args.listing_concurrency,
                 user_agent=args.user_agent,
+                dedup=args.dedup,
                 on_progress=_progress_callback,
             )
     finally:
@@ -3,26 +3,40 @@ from __future__ import annotations
 import asyncio
 import io
 import json
+import os
+import random
 import shutil
 import tarfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
 from pathlib import Path
-from typing import Callable, List, Optional, Sequence
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence
 
 from secfetch.entities import resolve_cik_filter, resolve_output_group_label
 from secfetch.edgar import filing_index_json_url, filing_folder_url
-from secfetch.exceptions import SecFetchError
+from secfetch.exceptions import RetryLaterError, SecFetchError
 from secfetch.forms import load_accepted_form_types, validate_forms
 from secfetch.index.filter import FilingFilter, filter_master_rows
-from secfetch.index.master import (
-    MasterIndexRow,
-    download_master_index,
-    load_master_index,
+from secfetch.index.columnar import load_quarter_rows
+from secfetch.index.daily import (
+    DailyIndexFile,
+    download_daily_index,
+    list_daily_index_files,
+    load_daily_index,
+    next_sync_start,
+    save_last_synced,
 )
+from secfetch.index.master import MasterIndexRow, download_master_index, quarter_is_closed
+from secfetch.index.plan import QuarterSlice, plan_index_files
+from secfetch.index.retention import IndexRetention, enforce_index_retention
 from secfetch.network.client import SecClient
-from secfetch.storage.layout import filing_dir
+from secfetch.network.concurrency import AdaptiveConcurrency
+from secfetch.storage.blobs import BlobStore, blob_store_path, file_digest
+from secfetch.storage.catalog import Catalog, CatalogEntry, catalog_path
+from secfetch.storage.layout import FilingLayout, filing_dir, form_dir_name, load_layout
+from secfetch.storage.listing_cache import ListingCache
 from secfetch.storage.manifest import Manifest, ManifestEntry
+from secfetch.storage.retry_queue import DeferredFiling, RetryQueue, retry_queue_path
 
 
 class DownloadError(SecFetchError):
@@ -35,11 +49,29 @@ class DownloadResult:
     cik: str
     form_type: str
     date_filed: date
-    status: str  # downloaded | skipped | error
+    status: str  # downloaded | skipped | deferred | error
     error: Optional[str] = None
     output_dir: Optional[str] = None
 
 
+@dataclass
+class DownloadPlan:
+    """Filings a run would fetch versus those already downloaded, worked out without network I/O."""
+
+    to_fetch: List[MasterIndexRow] = field(default_factory=list)
+    already_have: List[MasterIndexRow] = field(default_factory=list)
+    estimated_bytes: int = 0  # selected files of `to_fetch` whose size is known from cached listings
+    unsized: int = 0  # filings in `to_fetch` without a cached listing or with unsized files
+
+    def summary(self) -> dict:
+        return {
+            "to_fetch": len(self.to_fetch),
+            "already_have": len(self.already_have),
+            "estimated_bytes": self.estimated_bytes,
+            "unsized": self.unsized,
+        }
+
+
 def _normalize_file_types(file_types: Sequence[str]) -> List[str]:
     out: List[str] = []
     for t in file_types:
@@ -54,13 +86,25 @@ def _normalize_file_types(file_types: Sequence[str]) -> List[str]:
     return sorted(set(out))
 
 
+# `concurrency="auto"`: file fetches start at this many in flight and may grow to the maximum.
+_AUTO_CONCURRENCY_START = 4
+_AUTO_CONCURRENCY_MAX = 32
+
+# Throttled/5xx requests are re-queued this many times before a filing is deferred to a later pass.
+_MAX_DEFERRED_ATTEMPTS = 5
+
+
 def _default_manifest_path(data_dir: Path) -> Path:
     # keep clean: state under data/_state/
     return data_dir / "_state" / "manifest.json"
 
 
-def _filing_tar_path(*, data_dir: Path, form_type: str, cik: str, accession: str) -> Path:
-    return data_dir / "filings_tar" / form_type / cik.zfill(10) / f"{accession}.tar"
+def _default_listing_cache_path(data_dir: Path) -> Path:
+    return data_dir / "_state" / "listings.sqlite3"
+
+
+def _filing_tar_path(*, data_dir: Path, form_type: str, cik: str, accession: str, layout: FilingLayout) -> Path:
+    return layout.place(data_dir / "filings_tar" / form_dir_name(form_type) / cik.zfill(10), accession, f"{accession}.tar")
 
 
 class FilingDownloader:
@@ -69,8 +113,10 @@ class FilingDownloader:
       - downloads master.idx for a quarter
       - filters by form types
       - for each accession: uses EDGAR folder `index.json` to list files
+        (cached on disk; accession folders never change once published)
       - downloads only requested file types
-      - writes a manifest for de-dup/resume
+      - journals each completed filing to a manifest for de-dup/resume
+      - keeps quarter indexes according to `index_retention`
     """
 
     def __init__(
@@ -82,183 +128,628 @@ class FilingDownloader:
         include_amended: bool = False,
         cik: Optional[str | int | Sequence[str | int]] = None,
         ticker: Optional[str | Sequence[str]] = None,
-        concurrency: int = 6,
+        concurrency: int | str = 6,
         user_agent: Optional[str] = None,
         manifest_path: Optional[str | Path] = None,
         output_format: str = "files",
         on_progress: Optional[Callable[[int, int, Optional["DownloadResult"], int], None]] = None,
+        listing_cache_path: Optional[str | Path] = None,
+        index_retention: Optional[IndexRetention] = None,
+        listing_concurrency: Optional[int] = None,
+        dedup: bool = False,
     ) -> None:
         self.data_dir = Path(data_dir)
         self.file_types = _normalize_file_types(file_types)
         self.include_amended = include_amended
         self.cik_set = resolve_cik_filter(cik=cik, ticker=ticker)
         self.output_group_label = resolve_output_group_label(cik=cik, ticker=ticker)
-        self.concurrency = max(1, int(concurrency))
+        auto = concurrency == "auto"
+        self.concurrency = _AUTO_CONCURRENCY_MAX if auto else max(1, int(concurrency))
+        # Listings are small and latency-bound; size them apart from file fetches.
+        if listing_concurrency:
+            self.listing_concurrency = max(1, int(listing_concurrency))
+        else:
+            self.listing_concurrency = _AUTO_CONCURRENCY_START if auto else self.concurrency
         self._on_progress = on_progress
         if output_format not in ("files", "tar"):
             raise ValueError("output_format must be 'files' or 'tar'")
         self.output_format = output_format
+        if dedup and output_format != "files":
+            raise ValueError("dedup requires output_format='files'")
+        # Identical documents across filings are stored once and hardlinked into each folder.
+        self._blobs = BlobStore(blob_store_path(self.data_dir)) if dedup else None
+        self.index_retention = index_retention if index_retention is not None else IndexRetention()
+        self._layout = load_layout(self.data_dir)
 
         accepted = load_accepted_form_types(data_dir=self.data_dir)
         self.forms = validate_forms(forms=forms, accepted=accepted)
 
         self._client = SecClient.from_env(user_agent=user_agent, data_dir=self.data_dir)
+        self._autotune: Optional[AdaptiveConcurrency] = None
+        if auto:
+            self._autotune = AdaptiveConcurrency(
+                self._client.stats,
+                initial=_AUTO_CONCURRENCY_START,
+                maximum=_AUTO_CONCURRENCY_MAX,
+                rate_cap=lambda: self._client.request_rate,
+            )
         self._manifest = Manifest(Path(manifest_path) if manifest_path else _default_manifest_path(self.data_dir))
         self._manifest.load()
+        self._retry_queue = RetryQueue(retry_queue_path(self.data_dir))
+        self._retry_queue.load()
+        self._catalog = Catalog(catalog_path(self.data_dir, Path(manifest_path) if manifest_path else None))
+        self._listings = ListingCache(
+            Path(listing_cache_path) if listing_cache_path else _default_listing_cache_path(self.data_dir)
+        )
 
     async def aclose(self) -> None:
-        await self._client.aclose()
+        try:
+            await self._client.aclose()
+        finally:
+            self._listings.close()
+            self._manifest.close()
+            self._catalog.close()
+
+    async def _list_filing_files(self, *, cik: str, accession: str) -> List[dict]:
+        base_folder_url = filing_folder_url(cik=cik, accession=accession)
+        cached = self._listings.get(accession)
+        if cached is not None:
+            return [dict(f, href=base_folder_url + f["name"]) for f in cached]
+        listing = await self._client.get_json(filing_index_json_url(cik=cik, accession=accession), defer_retries=True)
+        files = _extract_files_from_index_json(listing, base_folder_url=base_folder_url)
+        self._listings.put(accession, files)
+        return files
 
     async def download_quarter(self, *, year: int, quarter: int) -> List[DownloadResult]:
         # Always fetch master index first (source of truth)
         master_path = await download_master_index(self._client, data_dir=self.data_dir, year=year, quarter=quarter)
-        rows = load_master_index(master_path)
+        flt = FilingFilter(forms=self.forms, include_amended=self.include_amended)
+        rows = await asyncio.to_thread(
+            load_quarter_rows,
+            master_path,
+            flt=flt,
+            cik_set=self.cik_set,
+            build=quarter_is_closed(year=year, quarter=quarter),
+        )
+        results = await self._download_rows(filter_master_rows(rows, flt))
+        enforce_index_retention(self.data_dir, self.index_retention)
+        return results
 
+    async def download_daily(
+        self,
+        *,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> List[DownloadResult]:
+        """
+        Ingest filings from EDGAR daily index files published since the last sync.
+
+        Only the per-day master files newer than the sync point stored in
+        data/_state/daily_sync.json are fetched (or from `since` when given).
+        The sync point advances to the newest ingested day once every matched
+        filing downloaded without error, so failures are picked up next run.
+        """
+        start = next_sync_start(self.data_dir, since=since)
+        end = until or date.today()
+        if start > end:
+            return []
         flt = FilingFilter(forms=self.forms, include_amended=self.include_amended)
-        matched = filter_master_rows(rows, flt)
-        if self.cik_set is not None:
-            matched = [r for r in matched if r.cik.zfill(10) in self.cik_set]
-        total = len(matched)
+        day_files, rows = await self._daily_rows(start=start, end=end, flt=flt)
+        if not day_files:
+            return []
+        results = await self._download_rows(filter_master_rows(rows, flt))
+        if all(r.status != "error" for r in results):
+            save_last_synced(self.data_dir, day_files[-1].day)
+        return results
+
+    async def download_range(self, *, start: date, end: date) -> List[DownloadResult]:
+        """
+        Download filings with `start <= date_filed <= end`.
+
+        The window is planned into the quarterly and daily index files that
+        cover it; all of them are fetched concurrently on this client, rows are
+        date-filtered while they are selected, and every match goes through a
+        single download pipeline.
+        """
+        plan = plan_index_files(start, end, data_dir=self.data_dir)
+        flt = FilingFilter(forms=self.forms, include_amended=self.include_amended)
+
+        async def quarterly(piece: QuarterSlice) -> List[MasterIndexRow]:
+            master_path = await download_master_index(
+                self._client, data_dir=self.data_dir, year=piece.year, quarter=piece.quarter
+            )
+            # Parse off the event loop so the other slices keep fetching meanwhile.
+            return await asyncio.to_thread(
+                load_quarter_rows,
+                master_path,
+                flt=flt,
+                cik_set=self.cik_set,
+                start=piece.start,
+                end=piece.end,
+                build=quarter_is_closed(year=piece.year, quarter=piece.quarter),
+            )
+
+        async def daily(piece: QuarterSlice) -> List[MasterIndexRow]:
+            _, rows = await self._daily_rows(start=piece.start, end=piece.end, flt=flt)
+            return rows
 
-        if self._on_progress is not None and total > 0:
-            self._on_progress(0, total, None, 0)
+        jobs = [(p, quarterly) for p in plan.quarterly] + [(p, daily) for p in plan.daily]
+        jobs.sort(key=lambda job: job[0].start)
+        chunks = await asyncio.gather(*[fetch(piece) for piece, fetch in jobs])
+        rows = [r for chunk in chunks for r in chunk]
+        results = await self._download_rows(filter_master_rows(rows, flt))
+        enforce_index_retention(self.data_dir, self.index_retention)
+        return results
 
-        sem = asyncio.Semaphore(self.concurrency)
+    async def _daily_rows(
+        self, *, start: date, end: date, flt: FilingFilter
+    ) -> tuple[List[DailyIndexFile], List[MasterIndexRow]]:
+        day_files = await list_daily_index_files(self._client, start=start, end=end)
+        paths = await asyncio.gather(
+            *[download_daily_index(self._client, data_dir=self.data_dir, f=f) for f in day_files]
+        )
+        rows: List[MasterIndexRow] = []
+        for path in paths:
+            rows.extend(load_daily_index(path, flt=flt, cik_set=self.cik_set))
+        return day_files, rows
+
+    async def _download_rows(self, matched: Sequence[MasterIndexRow]) -> List[DownloadResult]:
+        async def one_batch() -> AsyncIterator[Sequence[MasterIndexRow]]:
+            yield matched
+
+        return await self._run_pipeline(one_batch())
+
+    async def _run_pipeline(self, batches: AsyncIterator[Sequence[MasterIndexRow]]) -> List[DownloadResult]:
+        """
+        Download every row yielded by `batches` through a two-stage pipeline.
+
+        `listing_concurrency` listing workers resolve each filing's folder
+        listing and queue one task per selected file; `concurrency` file
+        workers fetch those tasks from any filing. The file queue between the
+        stages is bounded, so listings run ahead only far enough to keep the
+        file stage busy. A filing is committed once its last file lands.
+        With `concurrency="auto"` file fetches also pass through an
+        `AdaptiveConcurrency` limit tuned from the client's request stats.
+
+        Throttled or failing requests do not back off inside a worker: the
+        task is parked for the suggested delay and re-queued, so the worker
+        moves on. A filing still failing after `_MAX_DEFERRED_ATTEMPTS` is
+        recorded in the retry queue with status "deferred".
+        Results keep the order in which rows were queued.
+        """
+        listers = self.listing_concurrency
+        fetchers = self.concurrency
+        rows: asyncio.Queue = asyncio.Queue(maxsize=listers * 2)
+        files: asyncio.Queue = asyncio.Queue(maxsize=fetchers * 4)
+        results: List[Optional[DownloadResult]] = []
+        listing_attempts: dict[int, int] = {}
+        parked: set[asyncio.Task] = set()
+        seen: set[str] = set()
+        total = 0
         completed = 0
         in_progress = 0
-        progress_lock = asyncio.Lock()
+        producing = True
+
+        def report(result: Optional[DownloadResult]) -> None:
+            if self._on_progress is not None and total > 0:
+                self._on_progress(completed, total, result, in_progress)
 
-        async def with_progress(row: MasterIndexRow):
+        def stop_if_drained() -> None:
+            # Every queued filing has a result, so no task is queued or parked.
+            if not producing and completed == total:
+                for _ in range(listers):
+                    rows.put_nowait(None)
+                for _ in range(fetchers):
+                    files.put_nowait(None)
+
+        def finish(idx: int, result: DownloadResult, *, started: bool = True) -> None:
             nonlocal completed, in_progress
-            async with sem:
-                async with progress_lock:
-                    in_progress += 1
-                    if self._on_progress is not None:
-                        self._on_progress(completed, total, None, in_progress)
+            results[idx] = result
+            if started:
+                in_progress -= 1
+            completed += 1
+            report(result)
+            stop_if_drained()
+
+        def park(queue: asyncio.Queue, item: tuple, attempt: int, e: RetryLaterError) -> None:
+            delay = max(e.retry_after, min(60.0, 2**attempt + random.random()))
+
+            async def requeue() -> None:
+                await asyncio.sleep(delay)
+                await queue.put(item)
+
+            task = asyncio.create_task(requeue())
+            parked.add(task)
+            task.add_done_callback(parked.discard)
+
+        async def produce() -> None:
+            nonlocal total, producing
+            # One catalog scan up front: filings already downloaded never enter the queues.
+            have = self._catalog.output_paths(output_format=self.output_format)
+            try:
+                async for batch in batches:
+                    fresh = [r for r in batch if r.accession not in seen]
+                    seen.update(r.accession for r in fresh)
+                    if not fresh:
+                        continue
+                    total += len(fresh)
+                    report(None)
+                    for row in fresh:
+                        results.append(None)
+                        if have.get(row.accession) == self._output_path(row):
+                            finish(len(results) - 1, self._skipped(row), started=False)
+                            continue
+                        await rows.put((len(results) - 1, row))
+            finally:
+                producing = False
+                stop_if_drained()
+
+        async def list_stage() -> None:
+            nonlocal in_progress
+            while True:
+                item = await rows.get()
+                if item is None:
+                    return
+                idx, row = item
+                in_progress += 1
+                report(None)
                 try:
-                    result = await self._download_one(row=row)
-                finally:
-                    async with progress_lock:
+                    opened = await self._open_filing(idx, row)
+                except RetryLaterError as e:
+                    attempt = listing_attempts[idx] = listing_attempts.get(idx, 0) + 1
+                    if attempt < _MAX_DEFERRED_ATTEMPTS:
                         in_progress -= 1
-                        completed += 1
-                        if self._on_progress is not None:
-                            self._on_progress(completed, total, result, in_progress)
-            return result
+                        park(rows, item, attempt, e)
+                        continue
+                    opened = self._defer(row, e)
+                if isinstance(opened, DownloadResult):
+                    finish(idx, opened)
+                    continue
+                if not opened.pending:  # every file survived an earlier attempt
+                    finish(idx, self._commit_filing(opened))
+                    continue
+                for f in opened.pending:
+                    await files.put((opened, f))
+
+        async def file_stage() -> None:
+            while True:
+                item = await files.get()
+                if item is None:
+                    return
+                job, f = item
+                # Siblings of a failed file are still fetched: they are kept for the next attempt.
+                try:
+                    await self._fetch_file(job, f)
+                except RetryLaterError as e:
+                    attempt = job.attempts[f["name"]] = job.attempts.get(f["name"], 0) + 1
+                    if attempt < _MAX_DEFERRED_ATTEMPTS:
+                        park(files, item, attempt, e)
+                        continue
+                    job.error = job.error or e
+                except Exception as e:
+                    job.error = job.error or e
+                job.remaining -= 1
+                if job.remaining == 0:
+                    finish(job.index, self._commit_filing(job))
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(list_stage()) for _ in range(listers)]
+        tasks += [asyncio.create_task(file_stage()) for _ in range(fetchers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks + list(parked):
+                t.cancel()
+            self._manifest.save_atomic()
+            self._retry_queue.save_atomic()
+            self._catalog.flush()
+        return [r for r in results if r is not None]
+
+    async def retry_deferred(self) -> List[DownloadResult]:
+        """
+        Retry the filings recorded in data/_state/retry.json by earlier runs.
+
+        Filings that now download are removed from the queue; ones that are
+        throttled again stay there with their attempt count bumped.
+        """
+        rows = [
+            MasterIndexRow(
+                cik=d.cik,
+                company_name=d.company_name,
+                form_type=d.form_type,
+                date_filed=d.date_filed,
+                filename=d.filename,
+                accession=d.accession,
+            )
+            for d in self._retry_queue.entries()
+        ]
+        return await self._download_rows(rows)
 
-        tasks = [with_progress(row) for row in matched]
-        results = await asyncio.gather(*tasks)
-        self._manifest.save_atomic()
+    async def download_year(self, *, year: int, quarters: Sequence[int] = (1, 2, 3, 4)) -> List[DownloadResult]:
+        """
+        Download a year through one pipeline.
 
-        # If the whole quarter completed without errors, remove cached index data for that quarter.
-        # (User requested: delete index data after all files download for a quarter.)
-        if all(r.status != "error" for r in results):
-            try:
-                if master_path.parent.exists():
-                    shutil.rmtree(master_path.parent)
-            except Exception:
-                # Best-effort cleanup; do not fail downloads due to cleanup.
-                pass
+        Every quarter's index is fetched and parsed in the background up
+        front; quarters are queued in order, so Q2 filings start as soon as
+        Q1's queue drains below the concurrency limit.
+        """
+        flt = FilingFilter(forms=self.forms, include_amended=self.include_amended)
+
+        async def quarter_rows(quarter: int) -> List[MasterIndexRow]:
+            master_path = await download_master_index(
+                self._client, data_dir=self.data_dir, year=year, quarter=quarter
+            )
+            # Parse off the event loop so downloads keep flowing meanwhile.
+            rows = await asyncio.to_thread(
+                load_quarter_rows,
+                master_path,
+                flt=flt,
+                cik_set=self.cik_set,
+                build=quarter_is_closed(year=year, quarter=quarter),
+            )
+            return filter_master_rows(rows, flt)
+
+        prefetch = [asyncio.create_task(quarter_rows(int(q))) for q in quarters]
+
+        async def batches() -> AsyncIterator[Sequence[MasterIndexRow]]:
+            for task in prefetch:
+                yield await task
+
+        try:
+            results = await self._run_pipeline(batches())
+        finally:
+            for task in prefetch:
+                task.cancel()
+            await asyncio.gather(*prefetch, return_exceptions=True)
+        enforce_index_retention(self.data_dir, self.index_retention)
         return results
 
-    async def download_year(self, *, year: int, quarters: Sequence[int] = (1, 2, 3, 4)) -> List[DownloadResult]:
-        out: List[DownloadResult] = []
+    async def _fetch_file(self, job: "_FilingJob", f: dict) -> None:
+        if self._autotune is None:
+            await self._fetch_into(job, f)
+            return
+        async with self._autotune:
+            await self._fetch_into(job, f)
+
+    async def _fetch_into(self, job: "_FilingJob", f: dict) -> None:
+        path = job.tmp_dir / f["name"]
+        if self._blobs is None:
+            await self._client.download_to_path(f["href"], path, defer_retries=True)
+            return
+        _, job.digests[f["name"]] = await self._client.download_hashed(f["href"], path, defer_retries=True)
+
+    def _result(self, row: MasterIndexRow, status: str, **kwargs: Optional[str]) -> DownloadResult:
+        return DownloadResult(
+            accession=row.accession,
+            cik=row.cik,
+            form_type=row.form_type,
+            date_filed=row.date_filed,
+            status=status,
+            **kwargs,
+        )
+
+    def _skipped(self, row: MasterIndexRow) -> DownloadResult:
+        self._retry_queue.discard(row.accession)
+        return self._result(row, "skipped", output_dir=self._output_path(row))
+
+    def _output_path(self, row: MasterIndexRow) -> str:
+        # What the catalog records for this filing when this run committed it.
+        out_dir, tar_path = self._filing_paths(row)
+        return str(out_dir if self.output_format == "files" else tar_path)
+
+    def _on_disk_before_catalog(self, row: MasterIndexRow) -> bool:
+        """Manifest says downloaded and the output exists (filings committed before the catalog)."""
+        entry = self._manifest.get(row.accession)
+        if entry is None:
+            return False
+        out_dir, tar_path = self._filing_paths(row)
+        if self.output_format == "files":
+            return entry.strategy == "index" and out_dir.exists()
+        legacy = self._legacy_tar_path(row)
+        return entry.strategy == "index_tar" and (tar_path.exists() or (legacy is not None and legacy.exists()))
+
+    def _legacy_tar_path(self, row: MasterIndexRow) -> Optional[Path]:
+        """Where a tar of a form like "10-Q/A" was stored before tar paths used `form_dir_name`."""
+        if form_dir_name(row.form_type) == row.form_type:
+            return None
+        return self.data_dir / "filings_tar" / row.form_type / row.cik.zfill(10) / f"{row.accession}.tar"
+
+    def plan(self, rows: Sequence[MasterIndexRow]) -> DownloadPlan:
+        """
+        Split `rows` into filings still to fetch and ones already downloaded.
+
+        A filing counts as downloaded when the catalog has it at the path this
+        run would write to. Uses one catalog scan and one bulk listing-cache
+        read; only filings the manifest knows but the catalog does not (at
+        that path) are checked on disk.
+        """
+        have = self._catalog.output_paths(output_format=self.output_format)
+        plan = DownloadPlan()
+        seen: set[str] = set()
+        for row in rows:
+            if row.accession in seen:
+                continue
+            seen.add(row.accession)
+            if have.get(row.accession) == self._output_path(row) or self._on_disk_before_catalog(row):
+                plan.already_have.append(row)
+            else:
+                plan.to_fetch.append(row)
+
+        listings = self._listings.get_many(r.accession for r in plan.to_fetch)
+        for row in plan.to_fetch:
+            files = listings.get(row.accession)
+            sizes = [f["size"] for f in files or [] if _match_file_types(f["name"], self.file_types)]
+            if files is None or None in sizes:
+                plan.unsized += 1
+            plan.estimated_bytes += sum(size for size in sizes if size is not None)
+        return plan
+
+    async def plan_quarters(self, *, year: int, quarters: Sequence[int] = (1, 2, 3, 4)) -> DownloadPlan:
+        """Dry run for `download_quarter` / `download_year`: fetches only the quarter indexes."""
+        flt = FilingFilter(forms=self.forms, include_amended=self.include_amended)
+        rows: List[MasterIndexRow] = []
         for q in quarters:
-            out.extend(await self.download_quarter(year=year, quarter=int(q)))
-        return out
+            master_path = await download_master_index(self._client, data_dir=self.data_dir, year=year, quarter=int(q))
+            quarter_rows = await asyncio.to_thread(
+                load_quarter_rows,
+                master_path,
+                flt=flt,
+                cik_set=self.cik_set,
+                build=quarter_is_closed(year=year, quarter=int(q)),
+            )
+            rows.extend(filter_master_rows(quarter_rows, flt))
+        return self.plan(rows)
 
-    async def _download_one(self, *, row: MasterIndexRow) -> DownloadResult:
-        accession = row.accession
+    def _filing_paths(self, row: MasterIndexRow) -> tuple[Path, Path]:
         out_dir = filing_dir(
             data_dir=self.data_dir,
             form_type=row.form_type,
             cik=row.cik,
-            accession=accession,
+            accession=row.accession,
             group_label=self.output_group_label,
+            layout=self._layout,
         )
         tar_path = _filing_tar_path(
             data_dir=self.data_dir,
             form_type=row.form_type,
             cik=row.cik,
-            accession=accession,
+            accession=row.accession,
+            layout=self._layout,
         )
-        entry = self._manifest.get(accession)
-        if entry is not None:
-            if self.output_format == "files":
-                if entry.strategy == "index" and out_dir.exists():
-                    return DownloadResult(
-                        accession=accession,
-                        cik=row.cik,
-                        form_type=row.form_type,
-                        date_filed=row.date_filed,
-                        status="skipped",
-                    )
-            else:
-                if entry.strategy == "index_tar" and tar_path.exists():
-                    return DownloadResult(
-                        accession=accession,
-                        cik=row.cik,
-                        form_type=row.form_type,
-                        date_filed=row.date_filed,
-                        status="skipped",
-                        output_dir=str(tar_path),
-                    )
-
-        tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
-        tmp_tar = tar_path.with_suffix(".tmp")
+        return out_dir, tar_path
+
+    async def _open_filing(self, index: int, row: MasterIndexRow) -> "DownloadResult | _FilingJob":
+        """
+        Skip a filing that is already in the catalog, or list its folder and
+        prepare the temp folder its files are fetched into.
+        """
+        accession = row.accession
+        out_dir, tar_path = self._filing_paths(row)
+        # Cataloged at the path this run writes to; anywhere else (another group
+        # label's tree, a layout it predates) the filing is fetched again.
         try:
-            if tmp_dir.exists():
-                shutil.rmtree(tmp_dir)
-            if tmp_tar.exists():
-                tmp_tar.unlink()
-            tmp_dir.mkdir(parents=True, exist_ok=True)
-
-            index_url = filing_index_json_url(cik=row.cik, accession=accession)
-            listing = await self._client.get_json(index_url)
-            files = _extract_files_from_index_json(listing, base_folder_url=filing_folder_url(cik=row.cik, accession=accession))
-
-            selected = [f for f in files if _match_file_types(f["name"], self.file_types)]
-            if not selected:
+            entry = self._catalog.get(accession, output_format=self.output_format)
+            if entry is not None and entry.output_path == self._output_path(row):
+                return self._skipped(row)
+            # Filings committed before the catalog existed: check the disk once, then catalog them.
+            if self._on_disk_before_catalog(row):
+                if self.output_format == "files":
+                    self._catalog_filing(row, out_dir, _files_in_dir(out_dir))
+                else:
+                    legacy = self._legacy_tar_path(row)
+                    if legacy is not None and not tar_path.exists():
+                        tar_path.parent.mkdir(parents=True, exist_ok=True)
+                        os.replace(legacy, tar_path)
+                    self._catalog_filing(row, tar_path, _files_in_tar(tar_path))
+                return self._skipped(row)
+        except Exception as e:
+            # A corrupt legacy tar or a catalog error fails this filing, not the listing worker.
+            return self._result(row, "error", error=str(e))
+
+        job = _FilingJob(
+            index=index,
+            row=row,
+            out_dir=out_dir,
+            tar_path=tar_path,
+            tmp_dir=out_dir.with_name(out_dir.name + ".tmp"),
+        )
+        try:
+            if job.tmp_tar.exists():
+                job.tmp_tar.unlink()
+            job.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+            files = await self._list_filing_files(cik=row.cik, accession=accession)
+
+            job.selected = [f for f in files if _match_file_types(f["name"], self.file_types)]
+            if not job.selected:
                 raise DownloadError(
                     f"No files matched file_types={self.file_types} for accession {accession}"
                 )
+            job.pending = job.resume()
+            job.remaining = len(job.pending)
+            return job
+        except RetryLaterError:
+            job.discard()
+            raise
+        except Exception as e:
+            job.discard()
+            return self._result(row, "error", error=str(e))
+
+    def _catalog_filing(self, row: MasterIndexRow, output_path: Path, files: Sequence[tuple]) -> None:
+        self._catalog.record(
+            CatalogEntry(
+                accession=row.accession,
+                cik=row.cik.zfill(10),
+                form_type=row.form_type,
+                date_filed=row.date_filed.isoformat(),
+                output_format=self.output_format,
+                output_path=str(output_path),
+                files=tuple((name, size) for name, size in files),
+            )
+        )
 
-            for f in selected:
-                content = await self._client.get_bytes(f["href"])
-                (tmp_dir / f["name"]).write_bytes(content)
+    def _defer(self, row: MasterIndexRow, e: RetryLaterError) -> DownloadResult:
+        """Record a filing that kept being throttled for `retry_deferred`."""
+        self._retry_queue.add(
+            DeferredFiling(
+                accession=row.accession,
+                cik=row.cik,
+                company_name=row.company_name,
+                form_type=row.form_type,
+                date_filed=row.date_filed_str,
+                filename=row.filename,
+                error=str(e),
+            )
+        )
+        return self._result(row, "deferred", error=str(e))
 
+    def _commit_filing(self, job: "_FilingJob") -> DownloadResult:
+        """Move a filing whose files have all landed into place and record it in the manifest."""
+        row = job.row
+        accession = row.accession
+        if isinstance(job.error, RetryLaterError):
+            job.discard()
+            return self._defer(row, job.error)
+        try:
+            if job.error is not None:
+                raise job.error
+            files = [(f["name"], (job.tmp_dir / f["name"]).stat().st_size) for f in job.selected]
+            if self._blobs is not None:
+                for f in job.selected:
+                    path = job.tmp_dir / f["name"]
+                    # Files resumed from an earlier run were not hashed in flight.
+                    self._blobs.adopt(path, job.digests.get(f["name"]) or file_digest(path))
             if self.output_format == "files":
                 # Commit atomically-ish: replace whole folder only after success.
-                out_dir.parent.mkdir(parents=True, exist_ok=True)
-                if out_dir.exists():
-                    shutil.rmtree(out_dir)
-                tmp_dir.replace(out_dir)
-                output_path = str(out_dir)
+                job.out_dir.parent.mkdir(parents=True, exist_ok=True)
+                if job.out_dir.exists():
+                    shutil.rmtree(job.out_dir)
+                job.tmp_dir.replace(job.out_dir)
+                output_path = str(job.out_dir)
                 strategy = "index"
             else:
-                tmp_tar.parent.mkdir(parents=True, exist_ok=True)
-                with tarfile.open(tmp_tar, mode="w") as tf:
+                job.tmp_tar.parent.mkdir(parents=True, exist_ok=True)
+                with tarfile.open(job.tmp_tar, mode="w") as tf:
                     metadata = {
                         "accession": accession,
                         "cik": row.cik.zfill(10),
                         "form_type": row.form_type,
                         "date_filed": row.date_filed.isoformat(),
-                        "files": [f["name"] for f in selected],
+                        "files": [f["name"] for f in job.selected],
                     }
                     metadata_bytes = json.dumps(metadata).encode("utf-8")
                     meta_info = tarfile.TarInfo(name="metadata.json")
                     meta_info.size = len(metadata_bytes)
                     tf.addfile(meta_info, io.BytesIO(metadata_bytes))
-                    for f in selected:
-                        content = (tmp_dir / f["name"]).read_bytes()
-                        info = tarfile.TarInfo(name=f["name"])
-                        info.size = len(content)
-                        tf.addfile(info, io.BytesIO(content))
-
-                if tar_path.exists():
-                    tar_path.unlink()
-                tmp_tar.replace(tar_path)
-                shutil.rmtree(tmp_dir)
-                output_path = str(tar_path)
+                    for f in job.selected:
+                        # Streams from disk; never holds a whole document in memory.
+                        tf.add(job.tmp_dir / f["name"], arcname=f["name"], recursive=False)
+
+                if job.tar_path.exists():
+                    job.tar_path.unlink()
+                job.tmp_tar.replace(job.tar_path)
+                shutil.rmtree(job.tmp_dir)
+                output_path = str(job.tar_path)
                 strategy = "index_tar"
 
             self._manifest.upsert(
@@ -270,32 +761,71 @@ class FilingDownloader:
                     strategy=strategy,
                 )
             )
-
-            return DownloadResult(
-                accession=accession,
-                cik=row.cik,
-                form_type=row.form_type,
-                date_filed=row.date_filed,
-                status="downloaded",
-                output_dir=output_path,
-            )
+            self._catalog_filing(row, Path(output_path), files)
+            self._retry_queue.discard(accession)
+            return self._result(row, "downloaded", output_dir=output_path)
         except Exception as e:
-            # Cleanup partials
-            try:
-                if tmp_dir.exists():
-                    shutil.rmtree(tmp_dir)
-                if tmp_tar.exists():
-                    tmp_tar.unlink()
-            except Exception:
-                pass
-            return DownloadResult(
-                accession=accession,
-                cik=row.cik,
-                form_type=row.form_type,
-                date_filed=row.date_filed,
-                status="error",
-                error=str(e),
-            )
+            job.discard()
+            return self._result(row, "error", error=str(e))
+
+
+@dataclass
+class _FilingJob:
+    """A filing whose selected files are being fetched into `tmp_dir`."""
+
+    index: int
+    row: MasterIndexRow
+    out_dir: Path
+    tar_path: Path
+    tmp_dir: Path
+    selected: List[dict] = field(default_factory=list)
+    pending: List[dict] = field(default_factory=list)  # selected files still to fetch
+    remaining: int = 0
+    error: Optional[Exception] = None
+    attempts: Dict[str, int] = field(default_factory=dict)  # deferred retries per file name
+    digests: Dict[str, str] = field(default_factory=dict)  # sha256 per file name, when deduplicating
+
+    @property
+    def tmp_tar(self) -> Path:
+        return self.tar_path.with_suffix(".tmp")
+
+    def resume(self) -> List[dict]:
+        """
+        Selected files not yet in `tmp_dir` from an earlier attempt.
+
+        Each file there was renamed into place only after its body arrived, and
+        is kept when its size matches the listing (or the listing has no size).
+        Anything else in the folder (other file types, stale copies) is removed.
+        """
+        wanted = {f["name"]: f.get("size") for f in self.selected}
+        have: set[str] = set()
+        for p in self.tmp_dir.iterdir():
+            if p.is_file() and p.name in wanted and (wanted[p.name] is None or p.stat().st_size == wanted[p.name]):
+                have.add(p.name)
+            elif p.is_dir():
+                shutil.rmtree(p)
+            else:
+                p.unlink()
+        return [f for f in self.selected if f["name"] not in have]
+
+    def discard(self) -> None:
+        # Keep fetched files for the next attempt; drop the partial tar and empty folders.
+        try:
+            if self.tmp_tar.exists():
+                self.tmp_tar.unlink()
+            if self.tmp_dir.exists() and not any(self.tmp_dir.iterdir()):
+                self.tmp_dir.rmdir()
+        except Exception:
+            pass
+
+
+def _files_in_dir(path: Path) -> List[tuple]:
+    return sorted((p.name, p.stat().st_size) for p in path.iterdir() if p.is_file())
+
+
+def _files_in_tar(path: Path) -> List[tuple]:
+    with tarfile.open(path, mode="r") as tf:
+        return [(m.name, m.size) for m in tf.getmembers() if m.isfile() and m.name != "metadata.json"]
 
 
 def _match_file_types(name: str, file_types: Sequence[str]) -> bool:
@@ -306,7 +836,7 @@ def _match_file_types(name: str, file_types: Sequence[str]) -> bool:
 def _extract_files_from_index_json(payload: object, *, base_folder_url: str) -> List[dict]:
     """
     Parse SEC folder index.json response and return:
-    [{ "name": "...", "href": "https://..." }, ...]
+    [{ "name": "...", "href": "https://...", "size": int | None, "last_modified": str | None }, ...]
     """
     if not isinstance(payload, dict):
         raise DownloadError("index.json payload was not an object")
@@ -326,5 +856,18 @@ def _extract_files_from_index_json(payload: object, *, base_folder_url: str) ->
         name = it.get("name")
         if not isinstance(name, str) or not name:
             continue
-        out.append({"name": name, "href": base_folder_url + name})
+        size = it.get("size")
+        try:
+            size_val: Optional[int] = int(size) if size not in (None, "") else None
+        except (TypeError, ValueError):
+            size_val = None
+        modified = it.get("last-modified")
+        out.append(
+            {
+                "name": name,
+                "href": base_folder_url + name,
+                "size": size_val,
+                "last_modified": modified if isinstance(modified, str) else None,
+            }
+        )
     return out
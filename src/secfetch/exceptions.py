@@ -13,3 +13,10 @@ class RateLimitedError(SecFetchError):
 class MasterIndexParseError(SecFetchError):
     """Raised when master.idx cannot be parsed."""
 
+
+class RetryLaterError(SecFetchError):
+    """Raised instead of sleeping when a request asked for deferred retries and should be retried later."""
+
+    def __init__(self, message: str, *, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
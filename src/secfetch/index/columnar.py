@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Collection, Dict, List, Optional, Sequence
+
+from secfetch.exceptions import MasterIndexParseError
+from secfetch.index.master import MasterIndexRow, load_master_index, parse_master_index_bytes
+
+if TYPE_CHECKING:
+    from secfetch.index.filter import FilingFilter
+
+try:  # Optional: vectorized scans when numpy is installed (`pip install secfetcher[fast]`).
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None  # type: ignore[assignment]
+
+# File layout (little-endian), every section 8-byte aligned:
+#   header: magic, version, n_rows, n_forms, n_names, source_size, then section offsets
+#   cik      uint32[n_rows]
+#   form     uint16[n_rows]   -> index into the form table
+#   day      int32[n_rows]    -> date.toordinal()
+#   name     uint32[n_rows]   -> index into the company name table
+#   acc      20 bytes[n_rows] -> accession, e.g. b"0001000045-24-000001"
+#   form_off uint32[n_forms + 1] + form blob
+#   name_off uint32[n_names + 1] + name blob
+_MAGIC = b"SFCOLIDX"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIIIQ8Q")
+_ACC_WIDTH = 20
+_NAME_SPAN = struct.Struct("<II")
+_LITTLE = sys.byteorder == "little"
+
+
+def columnar_index_path(master_path: Path) -> Path:
+    return master_path.with_name("master.col")
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _string_table(values: Sequence[str]) -> tuple[array, bytes]:
+    offsets = array("I", [0])
+    blob = bytearray()
+    for v in values:
+        blob += v.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def _le(a: array) -> bytes:
+    if not _LITTLE:  # pragma: no cover - big-endian hosts
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def build_columnar_index(master_path: Path, dest: Optional[Path] = None) -> Path:
+    """
+    Convert a cached master.idx into the columnar binary format and return its path.
+    The file is written to a temp name and renamed, so readers never see a partial file.
+    """
+    dest = dest or columnar_index_path(master_path)
+    raw = master_path.read_bytes()
+    rows = parse_master_index_bytes(raw)
+
+    form_codes: Dict[str, int] = {}
+    name_codes: Dict[str, int] = {}
+    ciks = array("I")
+    forms = array("H")
+    days = array("i")
+    names = array("I")
+    accs = bytearray()
+    for r in rows:
+        ciks.append(int(r.cik))
+        forms.append(form_codes.setdefault(r.form_type, len(form_codes)))
+        days.append(r.date_filed.toordinal())
+        names.append(name_codes.setdefault(r.company_name, len(name_codes)))
+        accs += r.accession.encode("ascii", "replace")[:_ACC_WIDTH].ljust(_ACC_WIDTH, b"\0")
+    if len(form_codes) > 0xFFFF:
+        raise MasterIndexParseError("Too many distinct form types for the columnar index")
+
+    form_off, form_blob = _string_table(list(form_codes))
+    name_off, name_blob = _string_table(list(name_codes))
+    sections = [_le(ciks), _le(forms), _le(days), _le(names), bytes(accs), _le(form_off) + form_blob, _le(name_off) + name_blob]
+
+    offsets: List[int] = []
+    pos = _align(_HEADER.size)
+    for sec in sections:
+        offsets.append(pos)
+        pos = _align(pos + len(sec))
+    offsets.append(pos)  # end of file
+
+    header = _HEADER.pack(_MAGIC, _VERSION, len(rows), len(form_codes), len(name_codes), len(raw), *offsets)
+    tmp = dest.with_name(dest.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(header)
+        for off, sec in zip(offsets[:-1], sections, strict=True):
+            f.write(b"\0" * (off - f.tell()))
+            f.write(sec)
+        f.write(b"\0" * (offsets[-1] - f.tell()))
+    tmp.replace(dest)
+    return dest
+
+
+class ColumnarIndex:
+    """
+    Memory-mapped columnar view of one quarter's master.idx.
+
+    Filtering runs over the fixed-width columns (vectorized with numpy when it
+    is installed); only matching rows are turned into `MasterIndexRow`s.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        with path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            head = _HEADER.unpack_from(self._mm, 0)
+        except struct.error as e:
+            self._mm.close()
+            raise MasterIndexParseError(f"Invalid columnar index: {path}") from e
+        magic, version, n, n_forms, n_names, source_size, *offsets = head
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise MasterIndexParseError(f"Invalid columnar index: {path}")
+        self._n = n
+        self.source_size = source_size
+        self._off = offsets
+        self._forms = self._read_table(offsets[5], n_forms)
+        self._form_code = {f: i for i, f in enumerate(self._forms)}
+        self._names_blob = offsets[6] + 4 * (n_names + 1)
+
+    @classmethod
+    def open(cls, path: Path) -> "ColumnarIndex":
+        return cls(path)
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "ColumnarIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _column(self, offset: int, typecode: str, count: int):
+        view = memoryview(self._mm)[offset : offset + count * array(typecode).itemsize]
+        if _LITTLE:
+            return view.cast(typecode)
+        a = array(typecode, view.tobytes())  # pragma: no cover - big-endian hosts
+        a.byteswap()  # pragma: no cover
+        return a  # pragma: no cover
+
+    def _read_table(self, offset: int, count: int) -> List[str]:
+        offs = struct.unpack_from(f"<{count + 1}I", self._mm, offset)
+        base = offset + 4 * (count + 1)
+        return [self._mm[base + offs[i] : base + offs[i + 1]].decode("utf-8") for i in range(count)]
+
+    def _name(self, i: int) -> str:
+        a, b = _NAME_SPAN.unpack_from(self._mm, self._off[6] + 4 * i)
+        return self._mm[self._names_blob + a : self._names_blob + b].decode("utf-8", "replace")
+
+    def _matching_indices(
+        self,
+        form_codes: Optional[List[int]],
+        ciks: Optional[List[int]],
+        start: Optional[int],
+        end: Optional[int],
+    ) -> Sequence[int]:
+        n = self._n
+        o = self._off
+        if np is not None:
+            mask = np.ones(n, dtype=bool)
+            if form_codes is not None:
+                mask &= np.isin(np.frombuffer(self._mm, dtype="<u2", count=n, offset=o[1]), form_codes)
+            if ciks is not None:
+                mask &= np.isin(np.frombuffer(self._mm, dtype="<u4", count=n, offset=o[0]), ciks)
+            if start is not None or end is not None:
+                days = np.frombuffer(self._mm, dtype="<i4", count=n, offset=o[2])
+                if start is not None:
+                    mask &= days >= start
+                if end is not None:
+                    mask &= days <= end
+            return np.flatnonzero(mask).tolist()
+
+        idx: Sequence[int] = range(n)
+        if form_codes is not None:
+            col, wanted = self._column(o[1], "H", n), set(form_codes)
+            idx = [i for i in idx if col[i] in wanted]
+        if ciks is not None:
+            col, wanted_ciks = self._column(o[0], "I", n), set(ciks)
+            idx = [i for i in idx if col[i] in wanted_ciks]
+        if start is not None or end is not None:
+            col = self._column(o[2], "i", n)
+            lo = start if start is not None else -(2**31)
+            hi = end if end is not None else 2**31 - 1
+            idx = [i for i in idx if lo <= col[i] <= hi]
+        return idx
+
+    def select(
+        self,
+        *,
+        flt: Optional["FilingFilter"] = None,
+        cik_set: Optional[Collection[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[MasterIndexRow]:
+        """Rows matching the filter, CIK set and inclusive date range, in index order."""
+        form_codes = None
+        if flt is not None:
+            form_codes = [self._form_code[f] for f in flt.accepted_forms() if f in self._form_code]
+            if not form_codes:
+                return []
+        ciks = [int(c) for c in cik_set] if cik_set is not None else None
+        indices = self._matching_indices(
+            form_codes,
+            ciks,
+            start.toordinal() if start is not None else None,
+            end.toordinal() if end is not None else None,
+        )
+
+        o = self._off
+        cik_col = self._column(o[0], "I", self._n)
+        form_col = self._column(o[1], "H", self._n)
+        day_col = self._column(o[2], "i", self._n)
+        name_col = self._column(o[3], "I", self._n)
+        acc_base = o[4]
+        out: List[MasterIndexRow] = []
+        for i in indices:
+            cik = str(cik_col[i])
+            pos = acc_base + i * _ACC_WIDTH
+            accession = self._mm[pos : pos + _ACC_WIDTH].rstrip(b"\0").decode("ascii")
+            out.append(
+                MasterIndexRow(
+                    cik=cik,
+                    company_name=self._name(name_col[i]),
+                    form_type=self._forms[form_col[i]],
+                    date_filed=date.fromordinal(day_col[i]),
+                    filename=f"edgar/data/{cik}/{accession}.txt",
+                    accession=accession,
+                )
+            )
+        return out
+
+
+def _is_current(col_path: Path, master_path: Path) -> bool:
+    # master.idx only grows, so its size identifies the version a columnar file was built from.
+    try:
+        with ColumnarIndex.open(col_path) as idx:
+            return idx.source_size == master_path.stat().st_size
+    except (MasterIndexParseError, OSError, ValueError):
+        return False
+
+
+def ensure_columnar_index(master_path: Path, *, force: bool = False) -> Path:
+    """Return the columnar file for `master_path`, (re)building it when missing or stale."""
+    col_path = columnar_index_path(master_path)
+    if force or not _is_current(col_path, master_path):
+        build_columnar_index(master_path, col_path)
+    return col_path
+
+
+def load_quarter_rows(
+    master_path: Path,
+    *,
+    flt: Optional["FilingFilter"] = None,
+    cik_set: Optional[Collection[str]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    build: bool = True,
+) -> List[MasterIndexRow]:
+    """
+    Select rows from a cached quarter index.
+
+    A columnar file that matches master.idx is always used. Without one, it
+    is built first when `build` is true (pass it for closed quarters, whose
+    index never changes again); otherwise master.idx is parsed directly with
+    the form/CIK filter pushed down, which is far cheaper than a build that
+    the open quarter's next daily update would invalidate anyway.
+    """
+    col_path = columnar_index_path(master_path)
+    if not _is_current(col_path, master_path):
+        if not build:
+            rows = load_master_index(master_path, flt=flt, cik_set=cik_set)
+            if start is None and end is None:
+                return rows
+            lo = start or date.min
+            hi = end or date.max
+            return [r for r in rows if lo <= r.date_filed <= hi]
+        build_columnar_index(master_path, col_path)
+    with ColumnarIndex.open(col_path) as idx:
+        return idx.select(flt=flt, cik_set=cik_set, start=start, end=end)
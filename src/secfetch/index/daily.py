@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Collection, List, Optional
+
+from secfetch.index.master import MasterIndexRow, parse_master_index_bytes
+from secfetch.network.client import SecClient
+
+if TYPE_CHECKING:
+    from secfetch.index.filter import FilingFilter
+
+SEC_DAILY_INDEX_BASE = "https://www.sec.gov/Archives/edgar/daily-index/"
+
+_DAILY_MASTER_RE = re.compile(r"^master\.(\d{8})\.idx$")
+
+
+@dataclass(frozen=True)
+class DailyIndexFile:
+    day: date
+    name: str  # e.g. master.20240102.idx
+    year: int
+    quarter: int
+
+    @property
+    def url(self) -> str:
+        return f"{SEC_DAILY_INDEX_BASE}{self.year}/QTR{self.quarter}/{self.name}"
+
+
+def quarter_of(d: date) -> int:
+    return (d.month - 1) // 3 + 1
+
+
+def daily_index_listing_url(*, year: int, quarter: int) -> str:
+    return f"{SEC_DAILY_INDEX_BASE}{year}/QTR{quarter}/index.json"
+
+
+def daily_index_cache_path(*, data_dir: Path, f: DailyIndexFile) -> Path:
+    return data_dir / "index" / "daily" / str(f.year) / f"QTR{f.quarter}" / f.name
+
+
+def daily_sync_state_path(data_dir: Path) -> Path:
+    return data_dir / "_state" / "daily_sync.json"
+
+
+def load_last_synced(data_dir: Path) -> Optional[date]:
+    path = daily_sync_state_path(data_dir)
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        return date.fromisoformat(payload["last_synced"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_last_synced(data_dir: Path, day: date) -> None:
+    path = daily_sync_state_path(data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"last_synced": day.isoformat()}), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _quarters_between(start: date, end: date) -> List[tuple[int, int]]:
+    out: List[tuple[int, int]] = []
+    y, q = start.year, quarter_of(start)
+    while (y, q) <= (end.year, quarter_of(end)):
+        out.append((y, q))
+        y, q = (y + 1, 1) if q == 4 else (y, q + 1)
+    return out
+
+
+async def list_daily_index_files(client: SecClient, *, start: date, end: date) -> List[DailyIndexFile]:
+    """
+    Daily master files published for days in [start, end], oldest first.
+
+    Uses one folder listing per quarter instead of probing each calendar day,
+    so weekends and holidays cost nothing.
+    """
+    out: List[DailyIndexFile] = []
+    for year, quarter in _quarters_between(start, end):
+        payload = await client.get_json(daily_index_listing_url(year=year, quarter=quarter))
+        items = payload.get("directory", {}).get("item", []) if isinstance(payload, dict) else []
+        for it in items if isinstance(items, list) else []:
+            name = it.get("name") if isinstance(it, dict) else None
+            m = _DAILY_MASTER_RE.match(name or "")
+            if not m:
+                continue
+            raw = m.group(1)
+            try:
+                day = date(int(raw[:4]), int(raw[4:6]), int(raw[6:]))
+            except ValueError:
+                continue
+            if start <= day <= end:
+                out.append(DailyIndexFile(day=day, name=name, year=year, quarter=quarter))
+    out.sort(key=lambda f: f.day)
+    return out
+
+
+async def download_daily_index(client: SecClient, *, data_dir: Path, f: DailyIndexFile) -> Path:
+    """Download and cache one daily master file. Published daily files never change."""
+    cache_path = daily_index_cache_path(data_dir=data_dir, f=f)
+    if not cache_path.exists():
+        await client.download_to_path(f.url, cache_path)
+    return cache_path
+
+
+def load_daily_index(
+    path: Path,
+    *,
+    flt: Optional["FilingFilter"] = None,
+    cik_set: Optional[Collection[str]] = None,
+) -> List[MasterIndexRow]:
+    return parse_master_index_bytes(
+        path.read_bytes(),
+        forms=flt.accepted_forms() if flt is not None else None,
+        ciks=cik_set,
+    )
+
+
+def next_sync_start(data_dir: Path, *, since: Optional[date] = None, today: Optional[date] = None) -> date:
+    """First day to ingest: `since` when given, else the day after the stored sync point, else today."""
+    if since is not None:
+        return since
+    last = load_last_synced(data_dir)
+    if last is not None:
+        return last + timedelta(days=1)
+    return today or date.today()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence
+from typing import FrozenSet, Iterable, List, Sequence
 
 from secfetch.index.master import MasterIndexRow, iter_unique_accessions
 
@@ -11,6 +11,10 @@ class FilingFilter:
     forms: Sequence[str]
     include_amended: bool = False
 
+    def accepted_forms(self) -> FrozenSet[str]:
+        """Exact form types this filter accepts (used to push the filter into parsing)."""
+        return frozenset(f for f in self.forms if self.include_amended or "/A" not in f)
+
     def match(self, row: MasterIndexRow) -> bool:
         if row.form_type not in self.forms:
             return False
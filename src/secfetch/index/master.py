@@ -1,41 +1,129 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import date
+import os
+import zlib
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Collection, Iterable, List, Optional
+
+import httpx
 
 from secfetch.exceptions import MasterIndexParseError
 from secfetch.network.client import SecClient
 
+if TYPE_CHECKING:
+    from secfetch.index.filter import FilingFilter
+
 
-@dataclass(frozen=True)
 class MasterIndexRow:
-    cik: str
-    company_name: str
-    form_type: str
-    date_filed: date
-    filename: str  # edgar path under /Archives/
+    """
+    One master.idx row.
+
+    A plain `__slots__` class rather than a dataclass: a quarter has 300k+ rows,
+    so rows are kept small and cheap to build. The accession is derived once at
+    construction and `date_filed` is parsed from its string form only when read.
+    Treat instances as immutable.
+    """
+
+    __slots__ = ("cik", "company_name", "form_type", "filename", "accession", "_date_str", "_date")
+
+    def __init__(
+        self,
+        *,
+        cik: str,
+        company_name: str,
+        form_type: str,
+        date_filed: date | str,
+        filename: str,  # edgar path under /Archives/
+        accession: Optional[str] = None,
+    ) -> None:
+        self.cik = cik
+        self.company_name = company_name
+        self.form_type = form_type
+        self.filename = filename
+        self.accession = accession if accession is not None else _accession_from_filename(filename)
+        if isinstance(date_filed, date):
+            self._date: Optional[date] = date_filed
+            self._date_str = date_filed.isoformat()
+        else:
+            self._date = None
+            self._date_str = date_filed
 
     @property
-    def accession(self) -> str:
-        # filename is typically: edgar/data/{cik}/{accession_no_dash}/{accession}.txt
-        name = Path(self.filename).name
-        return name.removesuffix(".txt").removesuffix(".idx")
+    def date_filed(self) -> date:
+        d = self._date
+        if d is None:
+            d = self._date = _parse_date(self._date_str)
+        return d
+
+    @property
+    def date_filed_str(self) -> str:
+        """Filing date as written in the index, without building a `date`."""
+        return self._date_str
 
     @property
     def accession_no_dash(self) -> str:
         return self.accession.replace("-", "")
 
+    def _key(self) -> tuple:
+        return (self.cik, self.company_name, self.form_type, self.date_filed, self.filename)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MasterIndexRow):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (
+            f"MasterIndexRow(cik={self.cik!r}, company_name={self.company_name!r}, "
+            f"form_type={self.form_type!r}, date_filed={self._date_str!r}, filename={self.filename!r})"
+        )
+
+
+def _accession_from_filename(filename: str) -> str:
+    # filename is typically: edgar/data/{cik}/{accession}.txt
+    name = filename.rpartition("/")[2]
+    return name.removesuffix(".txt").removesuffix(".idx")
 
-def master_index_url(*, year: int, quarter: int) -> str:
-    return f"https://www.sec.gov/Archives/edgar/full-index/{year}/QTR{quarter}/master.idx"
+
+def _parse_date(value: str) -> date:
+    try:
+        if len(value) == 8 and value.isdigit():
+            # Daily index files write dates as YYYYMMDD.
+            return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+        return date.fromisoformat(value)
+    except ValueError as e:
+        raise MasterIndexParseError(f"Invalid date in master.idx row: {value!r}") from e
+
+
+def master_index_url(*, year: int, quarter: int, compressed: bool = False) -> str:
+    name = "master.gz" if compressed else "master.idx"
+    return f"https://www.sec.gov/Archives/edgar/full-index/{year}/QTR{quarter}/{name}"
 
 
 def master_index_cache_path(*, data_dir: Path, year: int, quarter: int) -> Path:
     return data_dir / "index" / "master" / str(year) / f"QTR{quarter}" / "master.idx"
 
 
+# Late filings can still land in a quarter's index for a few days after it ends.
+_QUARTER_CLOSE_GRACE_DAYS = 7
+
+
+def quarter_end(*, year: int, quarter: int) -> date:
+    if quarter == 4:
+        return date(year, 12, 31)
+    return date(year, quarter * 3 + 1, 1) - timedelta(days=1)
+
+
+def quarter_is_closed(*, year: int, quarter: int, today: Optional[date] = None) -> bool:
+    """True once a quarter's master.idx can no longer change."""
+    today = today or date.today()
+    return (today - quarter_end(year=year, quarter=quarter)).days > _QUARTER_CLOSE_GRACE_DAYS
+
+
 async def download_master_index(
     client: SecClient,
     *,
@@ -47,70 +135,142 @@ async def download_master_index(
     """
     Download and cache master.idx for a given year/quarter.
     Returns the path to the cached file.
+
+    A cached index of a closed quarter is used as-is. For the current quarter
+    the cache is revalidated with a conditional GET, so an unchanged index
+    costs a 304 instead of a full transfer.
+
+    The gzip variant (`master.gz`) is preferred and inflated while streaming to
+    the cache; plain `master.idx` is the fallback when it is unavailable.
     """
     cache_path = master_index_cache_path(data_dir=data_dir, year=year, quarter=quarter)
-    if cache_path.exists() and not force:
+    if cache_path.exists() and not force and quarter_is_closed(year=year, quarter=quarter):
+        _touch(cache_path)
         return cache_path
 
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    content = await client.get_bytes(master_index_url(year=year, quarter=quarter))
-    cache_path.write_bytes(content)
+    try:
+        written = await client.download_to_path(
+            master_index_url(year=year, quarter=quarter, compressed=True),
+            cache_path,
+            revalidate=not force,
+            decompress="gzip",
+        )
+    except (httpx.HTTPStatusError, zlib.error):
+        written = await client.download_to_path(
+            master_index_url(year=year, quarter=quarter),
+            cache_path,
+            revalidate=not force,
+        )
+    if written == 0:
+        _touch(cache_path)
     return cache_path
 
 
-def parse_master_index(lines: Iterable[str]) -> List[MasterIndexRow]:
+def _touch(path: Path) -> None:
+    # mtime doubles as "last used" for index cache retention.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+# Quarterly files end the header with "Filename", daily files with "File Name".
+_HEADER = b"CIK|Company Name|Form Type|Date Filed|File"
+
+
+def _data_offset(data: bytes) -> int:
+    """Byte offset of the first data row (after the header and its line of dashes)."""
+    header = data.find(_HEADER)
+    if header < 0:
+        raise MasterIndexParseError("No rows parsed from master.idx (header not found?)")
+    pos = data.find(b"\n", header)
+    while pos >= 0:
+        end = data.find(b"\n", pos + 1)
+        line = data[pos + 1 : end if end >= 0 else len(data)]
+        if line.strip().startswith(b"----"):
+            return end + 1 if end >= 0 else len(data)
+        pos = end
+    raise MasterIndexParseError("No rows parsed from master.idx (header not found?)")
+
+
+def parse_master_index_bytes(
+    data: bytes,
+    *,
+    forms: Optional[Collection[str]] = None,
+    ciks: Optional[Collection[str]] = None,
+) -> List[MasterIndexRow]:
     """
-    Parse SEC master.idx into structured rows.
+    Parse raw master.idx bytes into rows.
+
+    The header is located on the raw bytes and the data section is decoded in
+    one pass (much cheaper than decoding line by line); dates stay strings
+    until `date_filed` is read.
+
+    `forms` (exact form types) and `ciks` (padded or not) are pushed down into
+    the scan: non-matching lines are dropped on a substring check before any
+    field is split or any row is built.
     """
-    saw_header = False
-    in_data = False
     rows: List[MasterIndexRow] = []
+    append = rows.append
+    new_row = MasterIndexRow.__new__
+    form_set = frozenset(forms) if forms is not None else None
+    cik_set = frozenset(c.strip().lstrip("0") for c in ciks) if ciks is not None else None
 
-    for raw in lines:
-        line = raw.rstrip("\n")
-        if not in_data:
-            if line.startswith("CIK|Company Name|Form Type|Date Filed|Filename"):
-                saw_header = True
+    text = data[_data_offset(data) :].decode("utf-8", "replace")
+    if not text.strip():
+        raise MasterIndexParseError("No rows parsed from master.idx (header not found?)")
+
+    for line in text.split("\n"):
+        if line.count("|") != 4:
+            if not line.strip():
                 continue
-            # Data starts after the delimiter line of dashes that follows the header.
-            if saw_header and line.strip().startswith("----"):
-                in_data = True
+            raise MasterIndexParseError(f"Unexpected master.idx row format: {line!r}")
+        if cik_set is not None and line[: line.find("|")].lstrip("0") not in cik_set:
             continue
+        if form_set is not None:
+            start = line.find("|", line.find("|") + 1) + 1
+            if line[start : line.find("|", start)] not in form_set:
+                continue
+        cik, company_name, form_type, date_filed, filename = line.split("|")
 
-        if not line.strip():
-            continue
+        # Bypass __init__: this loop runs for every row of the quarter.
+        row = new_row(MasterIndexRow)
+        row.cik = cik.strip()
+        row.company_name = company_name.strip()
+        row.form_type = form_type.strip()
+        filename = filename.strip()
+        row.filename = filename
+        name = filename[filename.rfind("/") + 1 :]
+        row.accession = name[:-4] if name.endswith((".txt", ".idx")) else name
+        row._date_str = date_filed.strip()
+        row._date = None
+        append(row)
 
-        parts = line.split("|")
-        if len(parts) != 5:
-            raise MasterIndexParseError(f"Unexpected master.idx row format: {line!r}")
+    return rows
 
-        cik, company_name, form_type, date_filed_str, filename = parts
-        try:
-            yyyy, mm, dd = (int(x) for x in date_filed_str.split("-"))
-            dt = date(yyyy, mm, dd)
-        except Exception as e:
-            raise MasterIndexParseError(
-                f"Invalid date in master.idx row: {date_filed_str!r}"
-            ) from e
-
-        rows.append(
-            MasterIndexRow(
-                cik=cik.strip(),
-                company_name=company_name.strip(),
-                form_type=form_type.strip(),
-                date_filed=dt,
-                filename=filename.strip(),
-            )
-        )
 
-    if not rows:
-        raise MasterIndexParseError("No rows parsed from master.idx (header not found?)")
-    return rows
+def parse_master_index(lines: Iterable[str]) -> List[MasterIndexRow]:
+    """
+    Parse SEC master.idx into structured rows.
+    """
+    return parse_master_index_bytes("\n".join(line.rstrip("\n") for line in lines).encode("utf-8"))
 
 
-def load_master_index(path: Path) -> List[MasterIndexRow]:
-    text = path.read_text(errors="replace")
-    return parse_master_index(text.splitlines())
+def load_master_index(
+    path: Path,
+    *,
+    flt: Optional["FilingFilter"] = None,
+    cik_set: Optional[Collection[str]] = None,
+) -> List[MasterIndexRow]:
+    """
+    Load a cached master.idx. When `flt` / `cik_set` are given only matching
+    rows are materialized.
+    """
+    return parse_master_index_bytes(
+        path.read_bytes(),
+        forms=flt.accepted_forms() if flt is not None else None,
+        ciks=cik_set,
+    )
 
 
 def iter_unique_accessions(rows: Iterable[MasterIndexRow]) -> Iterable[MasterIndexRow]:
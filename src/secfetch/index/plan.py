@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+from secfetch.index.daily import quarter_of
+from secfetch.index.master import master_index_cache_path, quarter_end, quarter_is_closed
+
+# A quarter slice this short is cheaper to read from daily files (one listing
+# plus a handful of ~1/60-size files) than from the full quarterly index.
+DAILY_WINDOW_MAX_DAYS = 10
+
+
+@dataclass(frozen=True)
+class QuarterSlice:
+    year: int
+    quarter: int
+    start: date
+    end: date
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+
+@dataclass
+class IndexPlan:
+    """Which index files cover a date window: whole quarters and day ranges."""
+
+    quarterly: List[QuarterSlice] = field(default_factory=list)
+    daily: List[QuarterSlice] = field(default_factory=list)
+
+
+def quarter_start(*, year: int, quarter: int) -> date:
+    return date(year, 3 * (quarter - 1) + 1, 1)
+
+
+def plan_index_files(
+    start: date,
+    end: date,
+    *,
+    data_dir: Optional[Path] = None,
+    today: Optional[date] = None,
+) -> IndexPlan:
+    """
+    Split [start, end] into per-quarter slices and pick the cheapest index for each.
+
+    Short slices use daily index files, unless the quarter's master.idx is
+    already cached and closed (then it costs no request at all).
+    """
+    if start > end:
+        raise ValueError("start must be on or before end")
+    today = today or date.today()
+    end = min(end, today)
+    plan = IndexPlan()
+    if start > end:
+        return plan
+
+    y, q = start.year, quarter_of(start)
+    while (y, q) <= (end.year, quarter_of(end)):
+        piece = QuarterSlice(
+            year=y,
+            quarter=q,
+            start=max(start, quarter_start(year=y, quarter=q)),
+            end=min(end, quarter_end(year=y, quarter=q)),
+        )
+        cached = (
+            data_dir is not None
+            and quarter_is_closed(year=y, quarter=q, today=today)
+            and master_index_cache_path(data_dir=data_dir, year=y, quarter=q).exists()
+        )
+        if piece.days <= DAILY_WINDOW_MAX_DAYS and not cached:
+            plan.daily.append(piece)
+        else:
+            plan.quarterly.append(piece)
+        y, q = (y + 1, 1) if q == 4 else (y, q + 1)
+    return plan
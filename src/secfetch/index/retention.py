@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from secfetch.index.master import quarter_is_closed
+
+_POLICIES = ("keep", "lru", "max_age")
+
+
+@dataclass(frozen=True)
+class IndexRetention:
+    """
+    What to keep under data/index/master after a run.
+
+    - "keep": never delete cached quarter indexes (default)
+    - "lru": evict least recently used quarters until the cache fits `max_bytes`
+    - "max_age": evict quarters not used for `max_age_days`
+
+    Closed quarters never change, so they are pinned (never evicted) unless
+    `pin_closed_quarters` is False.
+    """
+
+    policy: str = "keep"
+    max_bytes: Optional[int] = None
+    max_age_days: Optional[float] = None
+    pin_closed_quarters: bool = True
+
+    def __post_init__(self) -> None:
+        if self.policy not in _POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(_POLICIES)}")
+        if self.policy == "lru" and (self.max_bytes is None or self.max_bytes < 0):
+            raise ValueError("policy='lru' requires max_bytes >= 0")
+        if self.policy == "max_age" and (self.max_age_days is None or self.max_age_days < 0):
+            raise ValueError("policy='max_age' requires max_age_days >= 0")
+
+
+def _quarter_dirs(data_dir: Path) -> List[Tuple[Path, int, int]]:
+    root = data_dir / "index" / "master"
+    out: List[Tuple[Path, int, int]] = []
+    if not root.is_dir():
+        return out
+    for year_dir in root.iterdir():
+        if not year_dir.is_dir() or not year_dir.name.isdigit():
+            continue
+        for qtr_dir in year_dir.iterdir():
+            name = qtr_dir.name
+            if qtr_dir.is_dir() and name.startswith("QTR") and name[3:] in ("1", "2", "3", "4"):
+                out.append((qtr_dir, int(year_dir.name), int(name[3:])))
+    return out
+
+
+def _usage(path: Path) -> Tuple[int, float]:
+    """(total bytes, last use) for a quarter directory; last use is the newest mtime."""
+    size = 0
+    last_used = 0.0
+    for p in path.rglob("*"):
+        if p.is_file():
+            st = p.stat()
+            size += st.st_size
+            last_used = max(last_used, st.st_mtime)
+    return size, last_used
+
+
+def enforce_index_retention(
+    data_dir: Path,
+    retention: IndexRetention,
+    *,
+    today: Optional[date] = None,
+    now: Optional[float] = None,
+) -> List[Path]:
+    """
+    Apply `retention` to the quarter index cache. Returns the removed directories.
+    Best-effort: directories that cannot be removed are skipped.
+    """
+    if retention.policy == "keep":
+        return []
+    now = time.time() if now is None else now
+
+    candidates: List[Tuple[Path, int, float]] = []
+    pinned_bytes = 0
+    for path, year, quarter in _quarter_dirs(data_dir):
+        size, last_used = _usage(path)
+        if retention.pin_closed_quarters and quarter_is_closed(year=year, quarter=quarter, today=today):
+            pinned_bytes += size
+            continue
+        candidates.append((path, size, last_used))
+
+    evict: List[Path] = []
+    if retention.policy == "max_age":
+        cutoff = now - float(retention.max_age_days or 0) * 86400.0
+        evict = [path for path, _, last_used in candidates if last_used < cutoff]
+    else:
+        total = pinned_bytes + sum(size for _, size, _ in candidates)
+        for path, size, _ in sorted(candidates, key=lambda c: c[2]):
+            if total <= int(retention.max_bytes or 0):
+                break
+            evict.append(path)
+            total -= size
+
+    removed: List[Path] = []
+    for path in evict:
+        try:
+            shutil.rmtree(path)
+            removed.append(path)
+        except OSError:
+            continue
+    return removed
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import os
 import random
+import time
+import zlib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import httpx
 
-from secfetch.exceptions import MissingUserAgentError, RateLimitedError
-from secfetch.network.rate_limit import RateLimiter
+from secfetch.exceptions import MissingUserAgentError, RateLimitedError, RetryLaterError
+from secfetch.network.concurrency import RequestStats
+from secfetch.network.http_cache import load_validators, store_validators
+from secfetch.network.rate_limit import RateLimiter, SharedRateLimiter
+
+_STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def _user_agent_from_email_json(data_dir: Optional[Path] = None) -> str:
@@ -44,10 +51,31 @@ def _user_agent_from_email_json(data_dir: Optional[Path] = None) -> str:
     return ""
 
 
+def _build_rate_limiter(config: "SecClientConfig") -> RateLimiter:
+    kwargs = {"burst": config.burst, "adaptive": config.adaptive_rate}
+    if config.rate_limit_backend == "local":
+        return RateLimiter(config.max_requests_per_second, **kwargs)
+    if config.rate_limit_backend == "shared":
+        return SharedRateLimiter(
+            config.max_requests_per_second,
+            state_path=config.rate_limit_state_path,
+            **kwargs,
+        )
+    raise ValueError("rate_limit_backend must be 'local' or 'shared'")
+
+
 @dataclass(frozen=True)
 class SecClientConfig:
     user_agent: str
     max_requests_per_second: float = 8.0
+    # Token-bucket capacity: with 8 req/s a burst of 2 keeps any 1s window at <= 10 requests.
+    burst: float = 2.0
+    # Back off the request rate on 429/5xx and recover it gradually (AIMD).
+    adaptive_rate: bool = True
+    # "local" limits this client only; "shared" splits one budget across all processes on the host.
+    rate_limit_backend: str = "local"
+    # State file for the shared backend (defaults to a file in the system temp dir).
+    rate_limit_state_path: Optional[Path] = None
     timeout_seconds: float = 30.0
     max_retries: int = 6
 
@@ -56,8 +84,9 @@ class SecClient:
     """
     Minimal SEC-safe HTTP client:
     - required User-Agent
-    - global rate limiting
+    - global token-bucket rate limiting, adapting to 429/5xx responses
     - retry/backoff on 429/5xx
+    - optional revalidating cache (ETag / Last-Modified) for mutable resources
     """
 
     def __init__(self, config: SecClientConfig):
@@ -67,7 +96,8 @@ class SecClient:
             )
 
         self._config = config
-        self._rate_limiter = RateLimiter(config.max_requests_per_second)
+        self._rate_limiter = _build_rate_limiter(config)
+        self.stats = RequestStats()
         self._client = httpx.AsyncClient(
             follow_redirects=True,
             timeout=httpx.Timeout(config.timeout_seconds),
@@ -91,59 +121,250 @@ class SecClient:
             or os.getenv("SEC_USER_AGENT")
             or _user_agent_from_email_json(data_dir=data_dir)
         )
-        return cls(SecClientConfig(user_agent=ua))
+        backend = os.getenv("SECFETCH_RATE_LIMIT_BACKEND") or "local"
+        state_path = os.getenv("SECFETCH_RATE_LIMIT_STATE")
+        return cls(
+            SecClientConfig(
+                user_agent=ua,
+                rate_limit_backend=backend,
+                rate_limit_state_path=Path(state_path) if state_path else None,
+            )
+        )
+
+    @property
+    def request_rate(self) -> float:
+        """Requests per second the rate limiter currently admits."""
+        return self._rate_limiter.rate
 
     async def aclose(self) -> None:
-        await self._client.aclose()
+        try:
+            await self._client.aclose()
+        finally:
+            self._rate_limiter.close()
 
     async def get_bytes(self, url: str) -> bytes:
         resp = await self._request("GET", url)
+        self.stats.bytes += len(resp.content)
         return resp.content
 
     async def get_text(self, url: str) -> str:
         resp = await self._request("GET", url)
+        self.stats.bytes += len(resp.content)
         return resp.text
 
-    async def get_json(self, url: str) -> Any:
-        resp = await self._request("GET", url)
+    async def get_json(
+        self,
+        url: str,
+        *,
+        cache_path: Optional[Path] = None,
+        defer_retries: bool = False,
+    ) -> Any:
+        """
+        Fetch and decode JSON. With `cache_path`, the body is kept on disk and
+        revalidated on later calls, so an unchanged resource costs a 304.
+        """
+        if cache_path is not None:
+            await self.download_to_path(url, cache_path, revalidate=True, defer_retries=defer_retries)
+            return json.loads(cache_path.read_bytes())
+        resp = await self._request("GET", url, defer_retries=defer_retries)
+        self.stats.bytes += len(resp.content)
         return resp.json()
 
-    async def _request(self, method: str, url: str) -> httpx.Response:
+    async def download_to_path(
+        self,
+        url: str,
+        path: Path,
+        *,
+        revalidate: bool = False,
+        decompress: Optional[str] = None,
+        defer_retries: bool = False,
+    ) -> int:
+        """
+        Stream `url` to `path` without buffering the body in memory.
+
+        Chunks are written to a sibling `.part` file which replaces `path` only
+        after the whole body arrived, so readers never see a truncated file.
+        Returns the number of bytes written.
+
+        With `revalidate=True` and an existing `path`, the stored ETag /
+        Last-Modified validators are sent as a conditional request; on
+        304 Not Modified the cached file is kept and 0 is returned.
+
+        `decompress="gzip"` inflates a gzip-compressed resource while it streams,
+        so `path` receives (and the return value counts) the decompressed bytes.
+
+        `defer_retries=True`: see `_request`.
+        """
+        written, _ = await self._stream_to_path(
+            url, path, revalidate=revalidate, decompress=decompress, defer_retries=defer_retries
+        )
+        return written
+
+    async def download_hashed(
+        self,
+        url: str,
+        path: Path,
+        *,
+        hash_name: str = "sha256",
+        defer_retries: bool = False,
+    ) -> Tuple[int, str]:
+        """Like `download_to_path`, also returning the hex digest of the body, computed as it streams."""
+        written, digest = await self._stream_to_path(url, path, defer_retries=defer_retries, hash_name=hash_name)
+        # Unconditional request, so the body always streamed and `digest` is set.
+        return written, digest or ""
+
+    async def _stream_to_path(
+        self,
+        url: str,
+        path: Path,
+        *,
+        revalidate: bool = False,
+        decompress: Optional[str] = None,
+        defer_retries: bool = False,
+        hash_name: Optional[str] = None,
+    ) -> Tuple[int, Optional[str]]:
+        if decompress not in (None, "gzip"):
+            raise ValueError("decompress must be None or 'gzip'")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part = path.with_name(path.name + ".part")
+        written = 0
+        digest: Optional[str] = None
+        validators = load_validators(path, url=url) if revalidate else None
+        headers = validators.conditional_headers() if validators is not None else None
+
+        async def sink(resp: httpx.Response) -> None:
+            nonlocal written, digest
+            written = 0
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if decompress == "gzip" else None
+            # Fresh per attempt: a retried body is hashed from its first byte.
+            hasher = hashlib.new(hash_name) if hash_name else None
+            with part.open("wb") as f:
+                async for chunk in resp.aiter_bytes(_STREAM_CHUNK_SIZE):
+                    if inflater is not None:
+                        chunk = inflater.decompress(chunk)
+                    f.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    written += len(chunk)
+                if inflater is not None:
+                    tail = inflater.flush()
+                    f.write(tail)
+                    if hasher is not None:
+                        hasher.update(tail)
+                    written += len(tail)
+                    if not inflater.eof:
+                        raise zlib.error(f"Truncated gzip stream from {url}")
+            if hasher is not None:
+                digest = hasher.hexdigest()
+
+        try:
+            resp = await self._request("GET", url, sink=sink, headers=headers, defer_retries=defer_retries)
+            if resp.status_code == 304:
+                return 0, None
+            self.stats.bytes += written
+            part.replace(path)
+            if revalidate:
+                store_validators(path, url=url, response=resp)
+        finally:
+            part.unlink(missing_ok=True)
+        return written, digest
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        sink: Optional[Callable[[httpx.Response], Awaitable[None]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        defer_retries: bool = False,
+    ) -> httpx.Response:
+        """
+        Send a request with rate limiting and retry/backoff.
+
+        When `sink` is given the response is opened in streaming mode and the
+        body is handed to `sink` instead of being read into memory; errors while
+        consuming the body are retried like any other transport error.
+        A 304 response (to a conditional request) is returned as-is.
+
+        With `defer_retries=True` a retryable failure (429, 5xx, transport
+        error) is not slept on here: `RetryLaterError` is raised at once with
+        the suggested delay, so the caller can free its slot and retry later.
+        """
         last_exc: Optional[Exception] = None
 
+        async def backoff(sleep_s: float, exc: Exception) -> None:
+            if defer_retries:
+                raise RetryLaterError(f"{exc} (retry in {sleep_s:.1f}s)", retry_after=sleep_s) from exc
+            await asyncio.sleep(sleep_s)
+
         for attempt in range(1, self._config.max_retries + 1):
             await self._rate_limiter.wait()
+            self.stats.requests += 1
+            started = time.monotonic()
             try:
-                resp = await self._client.request(method, url)
+                if sink is None:
+                    resp = await self._client.request(method, url, headers=headers)
+                    latency = time.monotonic() - started
+                else:
+                    request = self._client.build_request(method, url, headers=headers)
+                    resp = await self._client.send(request, stream=True)
+                    # Time to headers: a large body streaming slowly is not server congestion.
+                    latency = time.monotonic() - started
+                    try:
+                        if resp.is_success:
+                            await sink(resp)
+                    finally:
+                        await resp.aclose()
 
                 if resp.status_code == 429:
+                    self.stats.throttled += 1
+                    self._rate_limiter.on_throttled()
                     # SEC rate limit: obey Retry-After when present, else backoff.
                     retry_after = resp.headers.get("Retry-After")
                     if retry_after and retry_after.isdigit():
                         sleep_s = float(retry_after)
                     else:
                         sleep_s = min(60.0, (2**attempt) + random.random())
-                    await asyncio.sleep(sleep_s)
                     last_exc = RateLimitedError(f"429 rate limited for {url}")
+                    await backoff(sleep_s, last_exc)
                     continue
 
                 if 500 <= resp.status_code < 600:
+                    self.stats.server_errors += 1
+                    self._rate_limiter.on_throttled()
                     sleep_s = min(30.0, (2**attempt) * 0.5 + random.random())
-                    await asyncio.sleep(sleep_s)
                     last_exc = httpx.HTTPStatusError(
                         f"Server error {resp.status_code} for {url}",
                         request=resp.request,
                         response=resp,
                     )
+                    await backoff(sleep_s, last_exc)
                     continue
 
-                resp.raise_for_status()
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                self._rate_limiter.on_success()
+                self.stats.latency_seconds += latency
                 return resp
 
-            except (httpx.TimeoutException, httpx.NetworkError, httpx.HTTPStatusError) as e:
+            except httpx.HTTPStatusError as e:
+                if 400 <= e.response.status_code < 500:
+                    # Client errors other than 429 (404, 403, ...) will not change on retry.
+                    raise
+                last_exc = e
+                sleep_s = min(10.0, attempt * 0.5 + random.random())
+                await backoff(sleep_s, e)
+                continue
+
+            except (
+                httpx.TimeoutException,
+                httpx.NetworkError,
+                httpx.RemoteProtocolError,
+            ) as e:
+                self.stats.transport_errors += 1
                 last_exc = e
                 sleep_s = min(10.0, attempt * 0.5 + random.random())
-                await asyncio.sleep(sleep_s)
+                await backoff(sleep_s, e)
                 continue
 
         if last_exc:
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+
+@dataclass
+class RequestStats:
+    """Running totals kept by `SecClient`; callers diff two snapshots to get a window."""
+
+    requests: int = 0
+    throttled: int = 0  # 429 responses
+    server_errors: int = 0  # 5xx responses
+    transport_errors: int = 0  # timeouts, connection resets, broken streams
+    bytes: int = 0
+    latency_seconds: float = 0.0  # time to response headers, summed over successful requests
+
+    def snapshot(self) -> "RequestStats":
+        return replace(self)
+
+
+class AdaptiveConcurrency:
+    """
+    Resizable in-flight limit tuned from `RequestStats`, like TCP congestion control.
+
+    Every `window` seconds the limit is adjusted from the requests completed
+    in that window:
+      - any 429/5xx or transport error halves it (multiplicative decrease);
+      - mean latency above twice the best seen, or throughput falling after
+        the last increase, takes one slot back (requests are only queueing);
+      - otherwise, when the limit was the bottleneck and requests are not
+        already going out at the rate cap, it grows by one (additive increase).
+    It settles at the smallest limit that reaches the best throughput the
+    server and the request-rate cap allow.
+    """
+
+    def __init__(
+        self,
+        stats: RequestStats,
+        *,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        rate_cap: Optional[Callable[[], float]] = None,
+        window: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 1 <= minimum <= maximum:
+            raise ValueError("need 1 <= minimum <= maximum")
+        self._stats = stats
+        self._min = minimum
+        self._max = maximum
+        self._limit = min(max(int(initial), minimum), maximum)
+        self._rate_cap = rate_cap
+        self._window = window
+        self._clock = clock
+        self._in_flight = 0
+        self._blocked = False
+        self._cond = asyncio.Condition()
+        self._window_start = clock()
+        self._window_stats = stats.snapshot()
+        self._last_throughput: Optional[float] = None
+        self._last_step = 0
+        self._base_latency: Optional[float] = None
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            if self._in_flight >= self._limit:
+                self._blocked = True
+                await self._cond.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self.observe()
+            self._cond.notify_all()
+
+    async def __aenter__(self) -> "AdaptiveConcurrency":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.release()
+
+    def observe(self) -> None:
+        """Close the current window and adjust the limit once `window` seconds have passed."""
+        now = self._clock()
+        elapsed = now - self._window_start
+        if elapsed < self._window:
+            return
+        current = self._stats.snapshot()
+        prev = self._window_stats
+        self._window_start = now
+        self._window_stats = current
+        blocked, self._blocked = self._blocked, False
+
+        requests = current.requests - prev.requests
+        if requests <= 0:
+            return
+        failed = (
+            (current.throttled - prev.throttled)
+            + (current.server_errors - prev.server_errors)
+            + (current.transport_errors - prev.transport_errors)
+        )
+        ok = requests - failed
+        throughput = (current.bytes - prev.bytes) / elapsed
+        latency = (current.latency_seconds - prev.latency_seconds) / ok if ok > 0 else None
+        if latency is not None:
+            self._base_latency = latency if self._base_latency is None else min(self._base_latency, latency)
+
+        if ok < requests:
+            step = -max(1, self._limit // 2)
+        elif latency is not None and self._base_latency and latency > 2 * self._base_latency:
+            step = -1
+        elif (
+            self._last_step > 0
+            and self._last_throughput is not None
+            and throughput < self._last_throughput * 0.95
+        ):
+            step = -1
+        elif blocked and not self._at_rate_cap(requests / elapsed):
+            step = 1
+        else:
+            step = 0
+        self._last_throughput = throughput
+        self._last_step = step
+        self._limit = min(max(self._limit + step, self._min), self._max)
+
+    def _at_rate_cap(self, requests_per_second: float) -> bool:
+        if self._rate_cap is None:
+            return False
+        return requests_per_second >= 0.9 * self._rate_cap()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+
+@dataclass(frozen=True)
+class Validators:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def validators_path(body_path: Path) -> Path:
+    """Validators are kept in a sidecar next to the cached body."""
+    return body_path.with_name(body_path.name + ".http.json")
+
+
+def load_validators(body_path: Path, *, url: str) -> Optional[Validators]:
+    """
+    Return stored validators for `url`, or None when the body or sidecar is
+    missing, unreadable, or was fetched from a different URL.
+    """
+    side = validators_path(body_path)
+    if not body_path.exists() or not side.exists():
+        return None
+    try:
+        payload = json.loads(side.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("url") != url:
+        return None
+    v = Validators(url=url, etag=payload.get("etag"), last_modified=payload.get("last_modified"))
+    return v if (v.etag or v.last_modified) else None
+
+
+def store_validators(body_path: Path, *, url: str, response: httpx.Response) -> None:
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    side = validators_path(body_path)
+    if not etag and not last_modified:
+        side.unlink(missing_ok=True)
+        return
+    tmp = side.with_name(side.name + ".tmp")
+    tmp.write_text(
+        json.dumps({"url": url, "etag": etag, "last_modified": last_modified}),
+        encoding="utf-8",
+    )
+    tmp.replace(side)
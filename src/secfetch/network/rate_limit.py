@@ -1,28 +1,223 @@
 from __future__ import annotations
 
 import asyncio
+import os
+import struct
 import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+@dataclass
+class _BucketState:
+    tokens: float
+    updated: float
+    rate: float
+    last_decrease: float
 
 
 class RateLimiter:
     """
-    Simple global rate limiter (shared across requests).
+    Token-bucket rate limiter shared across requests.
 
-    Enforces an average max rate by spacing requests at 1/max_per_second.
+    Up to `burst` requests may go out back to back; after that requests are
+    admitted at the current rate. The rate adapts AIMD-style: `on_throttled()`
+    multiplies it by `decrease_factor` (not below `min_per_second`) and every
+    `on_success()` adds `increase_step` back until `max_per_second` is reached.
     """
 
-    def __init__(self, max_per_second: float) -> None:
+    def __init__(
+        self,
+        max_per_second: float,
+        *,
+        burst: float = 1.0,
+        adaptive: bool = True,
+        min_per_second: Optional[float] = None,
+        increase_step: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0,
+    ) -> None:
         if max_per_second <= 0:
             raise ValueError("max_per_second must be > 0")
-        self._interval = 1.0 / max_per_second
-        self._lock = asyncio.Lock()
-        self._next_time = 0.0
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self._max_rate = float(max_per_second)
+        self._min_rate = float(min_per_second) if min_per_second is not None else self._max_rate / 16
+        self._min_rate = min(self._min_rate, self._max_rate)
+        self._increase_step = float(increase_step) if increase_step is not None else self._max_rate / 50
+        self._decrease_factor = decrease_factor
+        self._decrease_cooldown = decrease_cooldown
+        self._adaptive = adaptive
+        self._capacity = float(burst)
+        self._state = _BucketState(
+            tokens=self._capacity,
+            updated=self._now(),
+            rate=self._max_rate,
+            last_decrease=float("-inf"),
+        )
+
+    @property
+    def rate(self) -> float:
+        with self._transaction() as st:
+            return st.rate
+
+    @property
+    def max_rate(self) -> float:
+        return self._max_rate
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[_BucketState]:
+        # asyncio is single-threaded and no caller awaits inside a transaction.
+        yield self._state
+
+    def _refill(self, st: _BucketState, now: float) -> None:
+        elapsed = max(0.0, now - st.updated)
+        st.tokens = min(self._capacity, st.tokens + elapsed * st.rate)
+        st.updated = max(st.updated, now)
+
+    def reserve(self) -> float:
+        """
+        Take one token and return how long the caller must wait before sending.
+
+        Tokens may go negative: each caller reserves its own slot in the future,
+        so nobody holds a lock while sleeping.
+        """
+        with self._transaction() as st:
+            self._refill(st, self._now())
+            st.tokens -= 1.0
+            if st.tokens >= 0:
+                return 0.0
+            return -st.tokens / st.rate
 
     async def wait(self) -> None:
-        async with self._lock:
-            now = time.monotonic()
-            if now < self._next_time:
-                await asyncio.sleep(self._next_time - now)
-            now2 = time.monotonic()
-            self._next_time = max(self._next_time, now2) + self._interval
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        if not self._adaptive:
+            return
+        with self._transaction() as st:
+            if st.rate >= self._max_rate:
+                return
+            self._refill(st, self._now())
+            st.rate = min(self._max_rate, st.rate + self._increase_step)
+
+    def on_throttled(self) -> None:
+        if not self._adaptive:
+            return
+        with self._transaction() as st:
+            now = self._now()
+            # Requests already in flight tend to fail together; cut once per burst.
+            if now - st.last_decrease < self._decrease_cooldown:
+                return
+            self._refill(st, now)
+            st.last_decrease = now
+            st.rate = max(self._min_rate, st.rate * self._decrease_factor)
+            st.tokens = min(st.tokens, 0.0)
+
+    def close(self) -> None:
+        return None
+
+
+_STATE_FORMAT = "<4d"
+_STATE_SIZE = struct.calcsize(_STATE_FORMAT)
+
+
+def default_shared_state_path() -> Path:
+    import tempfile
+
+    return Path(tempfile.gettempdir()) / "secfetch-rate-limit.state"
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Token bucket whose state lives in a small file shared by every process on the host.
+
+    Each reservation locks the file, refills and takes a token, and writes the
+    bucket back, so N concurrent jobs split one request budget instead of each
+    spending their own. Throttling seen by one process slows all of them.
+    The lock is held only for the few microseconds of that update.
+    """
+
+    def __init__(self, max_per_second: float, *, state_path: Optional[Path] = None, **kwargs) -> None:
+        self._path = Path(state_path) if state_path is not None else default_shared_state_path()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd: Optional[int] = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o666)
+        super().__init__(max_per_second, **kwargs)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _now(self) -> float:
+        # Wall clock: the only clock every process agrees on.
+        return time.time()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[_BucketState]:
+        fd = self._fd
+        if fd is None:
+            raise RuntimeError("SharedRateLimiter is closed")
+        _lock(fd)
+        try:
+            raw = os.pread(fd, _STATE_SIZE, 0) if hasattr(os, "pread") else _read_at_zero(fd)
+            if len(raw) == _STATE_SIZE:
+                st = _BucketState(*struct.unpack(_STATE_FORMAT, raw))
+            else:
+                st = _BucketState(
+                    tokens=self._capacity,
+                    updated=self._now(),
+                    rate=self._max_rate,
+                    last_decrease=float("-inf"),
+                )
+            # Another process may run with a different cap; never exceed ours.
+            st.rate = min(st.rate, self._max_rate)
+            yield st
+            packed = struct.pack(_STATE_FORMAT, st.tokens, st.updated, st.rate, st.last_decrease)
+            if hasattr(os, "pwrite"):
+                os.pwrite(fd, packed, 0)
+            else:  # pragma: no cover - Windows
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, packed)
+        finally:
+            _unlock(fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _read_at_zero(fd: int) -> bytes:  # pragma: no cover - Windows
+    os.lseek(fd, 0, os.SEEK_SET)
+    return os.read(fd, _STATE_SIZE)
+
+
+def _lock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
 
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+_READ_CHUNK = 1 << 20
+
+
+def blob_store_path(data_dir: Path) -> Path:
+    return data_dir / "_blobs"
+
+
+def file_digest(path: Path, hash_name: str = "sha256") -> str:
+    h = hashlib.new(hash_name)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store of filing documents (data/_blobs/<ab>/<cd>/<sha256>).
+
+    Filing folders hold hardlinks to the blobs, so an exhibit, schema or PDF
+    that appears byte-for-byte in many filings takes disk and page cache once.
+    Treat filing files as read-only: writing through one link changes every
+    filing sharing the blob. On filesystems without hardlinks (or when the store
+    sits on another device) files are left as plain copies.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def path_for(self, digest: str) -> Path:
+        return self._root / digest[:2] / digest[2:4] / digest
+
+    def adopt(self, path: Path, digest: str) -> bool:
+        """
+        Turn `path` into a link to the blob for `digest`.
+
+        New content moves into the store (the file becomes the blob); known
+        content replaces the file with a link to the existing blob. Returns
+        True when an existing blob was reused.
+        """
+        blob = self.path_for(digest)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, blob)
+                return False
+            except FileExistsError:
+                pass  # another filing with the same content got there first
+            except OSError:
+                return False
+        if os.path.samefile(blob, path):
+            return True
+        tmp = path.with_name(path.name + ".link")
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            return False
+        os.replace(tmp, path)
+        return True
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+
+
+def catalog_path(data_dir: Path, manifest_path: Optional[Path] = None) -> Path:
+    # A custom manifest is a separate download state; its catalog sits next to it.
+    if manifest_path is not None:
+        return manifest_path.with_suffix(".catalog.sqlite3")
+    return data_dir / "_state" / "catalog.sqlite3"
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    accession: str
+    cik: str  # zero-padded to 10 digits
+    form_type: str
+    date_filed: str  # YYYY-MM-DD
+    output_format: str  # files | tar
+    output_path: str
+    files: Tuple[Tuple[str, Optional[int]], ...]  # (name, size in bytes)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size or 0 for _, size in self.files)
+
+
+_COLUMNS = "accession, cik, form_type, date_filed, output_format, output_path, files"
+
+
+def _entry(row: tuple) -> CatalogEntry:
+    accession, cik, form_type, date_filed, output_format, output_path, files = row
+    return CatalogEntry(
+        accession=accession,
+        cik=cik,
+        form_type=form_type,
+        date_filed=date_filed,
+        output_format=output_format,
+        output_path=output_path,
+        files=tuple((name, size) for name, size in json.loads(files)),
+    )
+
+
+class Catalog:
+    """
+    SQLite catalog of committed filings (data/_state/catalog.sqlite3).
+
+    One row per (accession, output format), written as each filing is
+    committed, with indexes on (cik, date_filed) and (form_type, date_filed)
+    so "which of these do we already have" is an index lookup rather than a
+    walk over data/filings.
+    """
+
+    # Commit in batches; the journaled manifest still records every filing if the tail is lost.
+    _COMMIT_EVERY = 64
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path)
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS filings ("
+                " accession TEXT NOT NULL,"
+                " output_format TEXT NOT NULL,"
+                " cik TEXT NOT NULL,"
+                " form_type TEXT NOT NULL,"
+                " date_filed TEXT NOT NULL,"
+                " output_path TEXT NOT NULL,"
+                " total_bytes INTEGER NOT NULL,"
+                " files TEXT NOT NULL,"
+                " PRIMARY KEY (accession, output_format)"
+                ") WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS filings_cik_date ON filings (cik, date_filed);"
+                "CREATE INDEX IF NOT EXISTS filings_form_date ON filings (form_type, date_filed);"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def record(self, entry: CatalogEntry) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO filings"
+            " (accession, output_format, cik, form_type, date_filed, output_path, total_bytes, files)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.accession,
+                entry.output_format,
+                entry.cik,
+                entry.form_type,
+                entry.date_filed,
+                entry.output_path,
+                entry.total_bytes,
+                json.dumps([list(f) for f in entry.files], separators=(",", ":")),
+            ),
+        )
+        self._pending += 1
+        if self._pending >= self._COMMIT_EVERY:
+            self.flush()
+
+    def get(self, accession: str, *, output_format: str) -> Optional[CatalogEntry]:
+        if self._conn is None and not self._path.exists():
+            return None
+        row = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM filings WHERE accession = ? AND output_format = ?",
+            (accession, output_format),
+        ).fetchone()
+        return _entry(row) if row is not None else None
+
+    def output_paths(self, *, output_format: str) -> Dict[str, str]:
+        """Accession -> output path of every cataloged filing for one output format, in a single scan."""
+        if self._conn is None and not self._path.exists():
+            return {}
+        rows = self._connect().execute(
+            "SELECT accession, output_path FROM filings WHERE output_format = ?", (output_format,)
+        )
+        return dict(rows.fetchall())
+
+    def query(
+        self,
+        *,
+        forms: Optional[Collection[str]] = None,
+        ciks: Optional[Collection[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        output_format: Optional[str] = None,
+    ) -> List[CatalogEntry]:
+        """Entries matching every given filter (dates inclusive), oldest filing first."""
+        if self._conn is None and not self._path.exists():
+            return []
+        where: List[str] = []
+        args: List[object] = []
+        if forms is not None:
+            where.append(f"form_type IN ({','.join('?' * len(forms))})")
+            args.extend(forms)
+        if ciks is not None:
+            where.append(f"cik IN ({','.join('?' * len(ciks))})")
+            args.extend(str(int(c)).zfill(10) for c in ciks)
+        if start is not None:
+            where.append("date_filed >= ?")
+            args.append(start.isoformat())
+        if end is not None:
+            where.append("date_filed <= ?")
+            args.append(end.isoformat())
+        if output_format is not None:
+            where.append("output_format = ?")
+            args.append(output_format)
+        sql = f"SELECT {_COLUMNS} FROM filings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY date_filed, accession"
+        return [_entry(row) for row in self._connect().execute(sql, args)]
+
+    def rewrite_paths(self, fn: Callable[[str], str]) -> int:
+        """Replace every output path with `fn(path)` (after a layout change); returns rows changed."""
+        if self._conn is None and not self._path.exists():
+            return 0
+        conn = self._connect()
+        rows = conn.execute("SELECT accession, output_format, output_path FROM filings").fetchall()
+        changed = [(new, acc, fmt) for acc, fmt, old in rows if (new := fn(old)) != old]
+        conn.executemany("UPDATE filings SET output_path = ? WHERE accession = ? AND output_format = ?", changed)
+        conn.commit()
+        self._pending = 0
+        return len(changed)
+
+    def flush(self) -> None:
+        if self._conn is not None and self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import re
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Optional, Tuple
 
 
 def form_dir_name(form_type: str) -> str:
@@ -19,6 +23,62 @@ def filings_root(data_dir: Path) -> Path:
     return data_dir / "filings"
 
 
+@dataclass(frozen=True)
+class FilingLayout:
+    """
+    Where a filing sits inside its form/group folder.
+
+    `fanout=0` is the flat layout, `<group>/<accession>`. With `fanout=n`,
+    n levels of `width` hex characters taken from the SHA-256 of the
+    accession sit in between (`<group>/<ab>/<cd>/<accession>`), so no folder
+    holds more than 16**width entries per level however much one filer
+    publishes. A data dir's layout is recorded in data/_state/layout.json.
+    """
+
+    fanout: int = 0
+    width: int = 2
+
+    def __post_init__(self) -> None:
+        if self.fanout < 0 or not 1 <= self.width <= 4:
+            raise ValueError("layout needs fanout >= 0 and 1 <= width <= 4")
+        if self.fanout * self.width > 16:
+            raise ValueError("layout fanout * width must be at most 16")
+
+    def shards(self, accession: str) -> Tuple[str, ...]:
+        if not self.fanout:
+            return ()
+        digest = hashlib.sha256(accession.encode("ascii")).hexdigest()
+        w = self.width
+        return tuple(digest[i * w : (i + 1) * w] for i in range(self.fanout))
+
+    def place(self, parent: Path, accession: str, name: Optional[str] = None) -> Path:
+        """`parent/<shards>/<name>`; `name` defaults to the accession itself."""
+        return parent.joinpath(*self.shards(accession), name or accession)
+
+
+FLAT_LAYOUT = FilingLayout()
+
+
+def layout_path(data_dir: Path) -> Path:
+    return data_dir / "_state" / "layout.json"
+
+
+def load_layout(data_dir: Path) -> FilingLayout:
+    path = layout_path(data_dir)
+    if not path.exists():
+        return FLAT_LAYOUT
+    raw = json.loads(path.read_text())
+    return FilingLayout(fanout=int(raw.get("fanout", 0)), width=int(raw.get("width", 2)))
+
+
+def save_layout(data_dir: Path, layout: FilingLayout) -> None:
+    path = layout_path(data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(asdict(layout), indent=2, sort_keys=True))
+    tmp.replace(path)
+
+
 def filing_dir(
     *,
     data_dir: Path,
@@ -26,8 +86,9 @@ def filing_dir(
     cik: str,
     accession: str,
     group_label: str | None = None,
+    layout: FilingLayout = FLAT_LAYOUT,
 ) -> Path:
     base = filings_root(data_dir) / form_dir_name(form_type)
     if group_label:
-        return base / group_label / accession
-    return base / cik.zfill(10) / accession
+        return layout.place(base / group_label, accession)
+    return layout.place(base / cik.zfill(10), accession)
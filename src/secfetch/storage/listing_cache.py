@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class ListingCache:
+    """
+    Persistent accession -> folder listing cache.
+
+    EDGAR accession folders are immutable once published, so a listing never
+    needs to be fetched twice. All listings live in one SQLite file; each row
+    stores the file names with their sizes and last-modified timestamps as a
+    compact JSON array.
+    """
+
+    # Commit in batches; a lost tail only costs a few listing refetches.
+    _COMMIT_EVERY = 64
+    # Stays under SQLite's bound-parameter limit.
+    _QUERY_CHUNK = 500
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS listings ("
+                " accession TEXT PRIMARY KEY,"
+                " files TEXT NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, accession: str) -> Optional[List[dict]]:
+        """Return `[{"name", "size", "last_modified"}, ...]` or None when not cached."""
+        if self._conn is None and not self._path.exists():
+            return None
+        row = self._connect().execute(
+            "SELECT files FROM listings WHERE accession = ?", (accession,)
+        ).fetchone()
+        if row is None:
+            return None
+        return [
+            {"name": name, "size": size, "last_modified": modified}
+            for name, size, modified in json.loads(row[0])
+        ]
+
+    def get_many(self, accessions: Iterable[str]) -> Dict[str, List[dict]]:
+        """Cached listings for any of `accessions`, keyed by accession; missing ones are left out."""
+        if self._conn is None and not self._path.exists():
+            return {}
+        conn = self._connect()
+        wanted = list(accessions)
+        out: Dict[str, List[dict]] = {}
+        for i in range(0, len(wanted), self._QUERY_CHUNK):
+            chunk = wanted[i : i + self._QUERY_CHUNK]
+            rows = conn.execute(
+                f"SELECT accession, files FROM listings WHERE accession IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for accession, files in rows:
+                out[accession] = [
+                    {"name": name, "size": size, "last_modified": modified}
+                    for name, size, modified in json.loads(files)
+                ]
+        return out
+
+    def put(self, accession: str, files: List[dict]) -> None:
+        packed = [[f["name"], f.get("size"), f.get("last_modified")] for f in files]
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO listings (accession, files) VALUES (?, ?)",
+            (accession, json.dumps(packed, separators=(",", ":"))),
+        )
+        self._pending += 1
+        if self._pending >= self._COMMIT_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._conn is not None and self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
 import json
+import os
+import time
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import IO, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
 
 
 @dataclass(frozen=True)
@@ -15,30 +24,119 @@ class ManifestEntry:
     strategy: str
 
 
+def _entry(accession: str, payload: dict) -> ManifestEntry:
+    return ManifestEntry(
+        accession=accession,
+        form_type=payload["form_type"],
+        cik=payload["cik"],
+        date_filed=payload["date_filed"],
+        strategy=payload.get("strategy", "index"),
+    )
+
+
 class Manifest:
-    def __init__(self, path: Path) -> None:
+    """
+    Downloaded filings, keyed by accession.
+
+    State is a JSON snapshot (`path`, an {accession: entry} object) plus an
+    append-only journal next to it (`<path>.journal`, one JSON entry per line).
+    `upsert` appends one line and flushes it, so a filing is on record as soon
+    as it completes, even if the process dies; the journal is fsynced every
+    `fsync_every` records or `fsync_interval` seconds, whichever comes first.
+    Once the journal holds more records than the snapshot has entries (and at
+    least `compact_min`), it is folded into a new snapshot and truncated.
+    `load` reads the snapshot and replays the journal on top of it.
+
+    Several processes may share one manifest. Appends and compaction hold an
+    exclusive lock on `<path>.lock`, and compaction re-reads the snapshot and
+    journal under it, so records other processes appended since our `load` are
+    folded into the snapshot instead of being dropped. The journal is truncated
+    in place rather than unlinked so their open append handles stay valid.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        fsync_every: int = 64,
+        fsync_interval: float = 1.0,
+        compact_min: int = 4096,
+    ) -> None:
         self._path = path
+        self._journal_path = path.with_name(path.name + ".journal")
         self._data: Dict[str, ManifestEntry] = {}
+        self._lock_path = path.with_name(path.name + ".lock")
+        self._lock_fd: Optional[int] = None
+        self._journal: Optional[IO[str]] = None
+        self._journal_records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._fsync_every = max(1, int(fsync_every))
+        self._fsync_interval = fsync_interval
+        self._compact_min = compact_min
 
     @property
     def path(self) -> Path:
         return self._path
 
+    @property
+    def journal_path(self) -> Path:
+        return self._journal_path
+
     def load(self) -> None:
-        if not self._path.exists():
-            self._data = {}
-            return
-        raw = json.loads(self._path.read_text())
+        self._close_journal()
+        with self._locked():
+            self._data, self._journal_records = self._read_locked()
+
+    def _read_locked(self) -> Tuple[Dict[str, ManifestEntry], int]:
+        """Snapshot plus replayed journal as currently on disk; caller holds the lock."""
         out: Dict[str, ManifestEntry] = {}
-        for accession, payload in raw.items():
-            out[accession] = ManifestEntry(
-                accession=accession,
-                form_type=payload["form_type"],
-                cik=payload["cik"],
-                date_filed=payload["date_filed"],
-                strategy=payload.get("strategy", "index"),
-            )
-        self._data = out
+        if self._path.exists():
+            raw = json.loads(self._path.read_text())
+            for accession, payload in raw.items():
+                out[accession] = _entry(accession, payload)
+        records = 0
+        if self._journal_path.exists():
+            data = self._journal_path.read_bytes()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # A torn last line from a crash mid-append: cut it off so the next
+                # append starts on a fresh line instead of being glued onto it.
+                with self._journal_path.open("r+b") as f:
+                    f.truncate(complete)
+                    f.flush()
+                    os.fsync(f.fileno())
+            for line in data[:complete].splitlines():
+                try:
+                    payload = json.loads(line)
+                    out[payload["accession"]] = _entry(payload["accession"], payload)
+                except (ValueError, KeyError, TypeError):
+                    continue
+                records += 1
+        return out, records
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if self._lock_fd is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        fd = self._lock_fd
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
     def has(self, accession: str) -> bool:
         return accession in self._data
@@ -48,11 +146,64 @@ class Manifest:
 
     def upsert(self, entry: ManifestEntry) -> None:
         self._data[entry.accession] = entry
+        line = json.dumps(asdict(entry), separators=(",", ":")) + "\n"
+        with self._locked():
+            if self._journal is None:
+                self._journal = self._journal_path.open("a", encoding="utf-8")
+            self._journal.write(line)
+            self._journal.flush()
+        self._journal_records += 1
+        self._unsynced += 1
+        if self._unsynced >= self._fsync_every or time.monotonic() - self._last_sync >= self._fsync_interval:
+            self._sync()
+        if self._journal_records >= max(self._compact_min, len(self._data)):
+            self.compact()
+
+    def _sync(self) -> None:
+        if self._journal is not None and self._unsynced:
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _close_journal(self) -> None:
+        if self._journal is not None:
+            self._sync()
+            self._journal.close()
+            self._journal = None
+
+    def compact(self) -> None:
+        """Fold the journal on disk, including other processes' appends, into a new snapshot."""
+        with self._locked():
+            self._sync()
+            # Every upsert of ours is already in the journal, or in the snapshot of
+            # whoever compacted it, so the files on disk are the complete state.
+            data, _ = self._read_locked()
+            tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+            payload = {acc: asdict(ent) for acc, ent in data.items()}
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"), sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            tmp.replace(self._path)
+            # Replaying the old journal over the new snapshot would be harmless, so a
+            # crash between the rename and the truncate loses nothing.
+            if self._journal_path.exists():
+                with self._journal_path.open("r+b") as f:
+                    f.truncate(0)
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._data = data
+            self._journal_records = 0
 
     def save_atomic(self) -> None:
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        tmp = self._path.with_suffix(self._path.suffix + ".tmp")
-        payload = {acc: asdict(ent) for acc, ent in self._data.items()}
-        tmp.write_text(json.dumps(payload, indent=2, sort_keys=True))
-        tmp.replace(self._path)
+        """Make every upsert durable: fsync the journal and compact it when it has grown."""
+        if self._journal_records >= max(self._compact_min, len(self._data)) or not self._path.exists():
+            self.compact()
+        else:
+            self._sync()
 
+    def close(self) -> None:
+        self._close_journal()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from secfetch.storage.catalog import Catalog
+from secfetch.storage.layout import FilingLayout, filings_root, form_dir_name, save_layout
+
+# Filing folders, local tars and their in-progress `.tmp` siblings.
+_ENTRY = re.compile(r"^(\d{10}-\d{2}-\d{6})(\.tar|\.tmp)?$")
+_SHARD = re.compile(r"^[0-9a-f]{1,4}$")
+_CIK = re.compile(r"^\d{10}$")
+
+
+def _entries(folder: Path) -> Iterator[Path]:
+    """Filing entries under a form/group folder, whatever shard levels they sit in."""
+    for entry in os.scandir(folder):
+        if _ENTRY.match(entry.name):
+            yield Path(entry.path)
+        elif _SHARD.match(entry.name) and entry.is_dir(follow_symlinks=False):
+            yield from _entries(Path(entry.path))
+
+
+def _group_dir(entry: Path) -> Path:
+    parent = entry.parent
+    while _SHARD.match(parent.name):
+        parent = parent.parent
+    # Tars of forms like "10-Q/A" used to nest the raw form type
+    # (filings_tar/10-Q/A/<cik>); they belong under filings_tar/10-Q_A/<cik>.
+    sub, form = parent.parent, parent.parent.parent
+    if form.parent.name == "filings_tar":
+        return form.parent / form_dir_name(f"{form.name}/{sub.name}") / parent.name
+    return parent
+
+
+def _group_dirs(form: Path) -> Iterator[Tuple[Path, bool]]:
+    """(group folder, whether it is a legacy amended-form folder) under a form folder."""
+    for group in os.scandir(form):
+        if not group.is_dir(follow_symlinks=False):
+            continue
+        nested = [Path(e.path) for e in os.scandir(group.path) if _CIK.match(e.name) and e.is_dir(follow_symlinks=False)]
+        if nested:
+            # Legacy amended-form tars: `group` is the part of the form type after "/".
+            yield from ((cik_dir, True) for cik_dir in nested)
+        else:
+            yield Path(group.path), False
+
+
+def _prune_shards(folder: Path) -> None:
+    for entry in os.scandir(folder):
+        if _SHARD.match(entry.name) and entry.is_dir(follow_symlinks=False):
+            _prune_shards(Path(entry.path))
+            try:
+                os.rmdir(entry.path)
+            except OSError:
+                pass  # still holds filings (or something we don't own)
+
+
+def _relocate(entry: Path, layout: FilingLayout) -> Path:
+    m = _ENTRY.match(entry.name)
+    if m is None:
+        return entry
+    return layout.place(_group_dir(entry), m.group(1), entry.name)
+
+
+def _moved_path(output_path: str, layout: FilingLayout) -> str:
+    # Only follow entries that are really at their new place (including ones an
+    # interrupted earlier run moved); anything else keeps pointing where it is.
+    old = Path(output_path)
+    new = _relocate(old, layout)
+    if new != old and new.exists() and not old.exists():
+        return str(new)
+    return output_path
+
+
+def relayout(data_dir: Path, layout: FilingLayout, *, catalog: Optional[Catalog] = None) -> int:
+    """
+    Move every filing folder and local tar under `data_dir` to `layout`, in place.
+
+    Entries are found by name at any shard depth, so the tree may be in any
+    layout, or a mix of two after an interrupted run; running again finishes
+    the job. Tars of amended forms stored under the raw form type
+    (filings_tar/10-Q/A/<cik>) move to filings_tar/10-Q_A/<cik> on the way.
+    Renames stay within one filesystem, and hardlinked documents keep
+    sharing their blobs. `catalog` output paths are rewritten for entries
+    found at their new place. The new layout is recorded last, once every
+    entry has moved. Returns the number of entries moved.
+    """
+    moved = 0
+    for root in (filings_root(data_dir), data_dir / "filings_tar"):
+        if not root.is_dir():
+            continue
+        for form in os.scandir(root):
+            if not form.is_dir(follow_symlinks=False):
+                continue
+            for group, legacy in list(_group_dirs(Path(form.path))):
+                for entry in list(_entries(group)):
+                    dest = _relocate(entry, layout)
+                    if dest == entry:
+                        continue
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(entry, dest)
+                    moved += 1
+                _prune_shards(group)
+                if legacy:
+                    for emptied in (group, group.parent, group.parent.parent):
+                        try:
+                            os.rmdir(emptied)
+                        except OSError:
+                            pass  # still holds something
+    if catalog is not None:
+        catalog.rewrite_paths(lambda p: _moved_path(p, layout))
+    save_layout(data_dir, layout)
+    return moved
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+
+def retry_queue_path(data_dir: Path) -> Path:
+    return data_dir / "_state" / "retry.json"
+
+
+@dataclass(frozen=True)
+class DeferredFiling:
+    """A filing whose requests kept being throttled or failing server-side; retried by a later pass."""
+
+    accession: str
+    cik: str
+    company_name: str
+    form_type: str
+    date_filed: str
+    filename: str
+    error: str
+    attempts: int = 1
+
+
+class RetryQueue:
+    """Deferred filings stored as JSON (data/_state/retry.json), keyed by accession."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._data: Dict[str, DeferredFiling] = {}
+        self._dirty = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self) -> None:
+        self._dirty = False
+        if not self._path.exists():
+            self._data = {}
+            return
+        raw = json.loads(self._path.read_text())
+        out: Dict[str, DeferredFiling] = {}
+        for accession, payload in raw.items():
+            out[accession] = DeferredFiling(
+                accession=accession,
+                cik=payload["cik"],
+                company_name=payload.get("company_name", ""),
+                form_type=payload["form_type"],
+                date_filed=payload["date_filed"],
+                filename=payload["filename"],
+                error=payload.get("error", ""),
+                attempts=int(payload.get("attempts", 1)),
+            )
+        self._data = out
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def entries(self) -> List[DeferredFiling]:
+        return list(self._data.values())
+
+    def add(self, entry: DeferredFiling) -> None:
+        prev = self._data.get(entry.accession)
+        if prev is not None:
+            entry = DeferredFiling(**{**asdict(entry), "attempts": prev.attempts + 1})
+        self._data[entry.accession] = entry
+        self._dirty = True
+
+    def discard(self, accession: str) -> None:
+        if self._data.pop(accession, None) is not None:
+            self._dirty = True
+
+    def save_atomic(self) -> None:
+        if not self._dirty:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+        payload = {acc: asdict(ent) for acc, ent in self._data.items()}
+        tmp.write_text(json.dumps(payload, indent=2, sort_keys=True))
+        tmp.replace(self._path)
+        self._dirty = False
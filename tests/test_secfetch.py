@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
+import shutil
 import tarfile
 from pathlib import Path
 
@@ -40,15 +43,37 @@ class DummyClient:
     async def get_bytes(self, url: str) -> bytes:
         if url.endswith("/master.idx") or url.endswith("master.idx"):
             return self._master_idx_text.encode("utf-8")
+        if url.endswith("/master.gz"):
+            return gzip.compress(self._master_idx_text.encode("utf-8"))
         return self._file_bytes[url]
 
-    async def get_json(self, url: str):
+    async def download_to_path(
+        self,
+        url: str,
+        path: Path,
+        *,
+        revalidate: bool = False,
+        decompress: str | None = None,
+        defer_retries: bool = False,
+    ) -> int:
+        content = await self.get_bytes(url)
+        if decompress == "gzip":
+            content = gzip.decompress(content)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return len(content)
+
+    async def download_hashed(self, url: str, path: Path, *, hash_name: str = "sha256", defer_retries: bool = False):
+        written = await self.download_to_path(url, path)
+        return written, hashlib.new(hash_name, path.read_bytes()).hexdigest()
+
+    async def get_json(self, url: str, **kwargs):
         # Only used for /index.json
         assert url.endswith("index.json")
         return self._listing
 
 
-def test_quarter_download_deletes_index_on_success(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_quarter_download_keeps_index_on_success(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     data_dir = tmp_path / "data"
     _write_accepted_forms(data_dir, ["10-Q"])
 
@@ -83,9 +108,9 @@ def test_quarter_download_deletes_index_on_success(tmp_path: Path, monkeypatch:
     assert len(res) == 1
     assert res[0].status == "downloaded"
 
-    # Index cache for the quarter should be deleted on success
+    # Default retention keeps the quarter index for the next job
     qtr_index_dir = data_dir / "index" / "master" / "2024" / "QTR1"
-    assert not qtr_index_dir.exists()
+    assert (qtr_index_dir / "master.idx").exists()
 
     # Downloaded file should exist
     out_file = data_dir / "filings" / "10-Q" / "0001000045" / accession / "doc.xml"
@@ -322,3 +347,1262 @@ def test_quarter_download_tar_ignores_old_file_mode_manifest(tmp_path: Path, mon
     assert res[0].status == "downloaded"
     tar_path = Path(res[0].output_dir or "")
     assert tar_path.exists()
+
+
+def test_client_download_to_path_streams_and_retries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncio
+
+    import httpx
+
+    import secfetch.network.client as client_mod
+    from secfetch.network.client import SecClient, SecClientConfig
+
+    calls = {"n": 0}
+    now = {"t": 0.0}
+
+    async def slow_body():
+        for _ in range(4):
+            now["t"] += 5.0  # a large document taking a while to stream
+            yield b"x" * 50_000
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return httpx.Response(503)
+        if calls["n"] == 2:
+            raise httpx.ConnectError("connection reset", request=request)
+        return httpx.Response(200, content=slow_body())
+
+    async def no_sleep(_s: float) -> None:
+        return None
+
+    monkeypatch.setattr(client_mod.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(client_mod.time, "monotonic", lambda: now["t"])
+
+    client = SecClient(SecClientConfig(user_agent="Test test@example.com", max_requests_per_second=1000))
+
+    async def run() -> int:
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await client.download_to_path("https://www.sec.gov/x.pdf", tmp_path / "out" / "x.pdf")
+        finally:
+            await client.aclose()
+
+    written = asyncio.run(run())
+    assert written == 200_000
+    assert calls["n"] == 3
+    stats = client.stats
+    assert (stats.requests, stats.server_errors, stats.transport_errors, stats.bytes) == (3, 1, 1, 200_000)
+    # Latency is time to headers, not the time the body took to stream.
+    assert stats.latency_seconds == 0.0
+    assert (tmp_path / "out" / "x.pdf").read_bytes() == b"x" * 200_000
+    assert not (tmp_path / "out" / "x.pdf.part").exists()
+
+
+def test_rate_limiter_bursts_then_backs_off_and_recovers(monkeypatch: pytest.MonkeyPatch) -> None:
+    import secfetch.network.rate_limit as rl_mod
+    from secfetch.network.rate_limit import RateLimiter
+
+    now = {"t": 100.0}
+    monkeypatch.setattr(rl_mod.time, "monotonic", lambda: now["t"])
+
+    lim = RateLimiter(10.0, burst=3, increase_step=1.0)
+    assert [lim.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert lim.reserve() == pytest.approx(0.1)
+
+    now["t"] += 5.0
+    lim.on_throttled()
+    assert lim.rate == pytest.approx(5.0)
+    # A second failure from the same burst does not cut the rate again.
+    lim.on_throttled()
+    assert lim.rate == pytest.approx(5.0)
+    # Bursting stops right after throttling.
+    assert lim.reserve() == pytest.approx(0.2)
+
+    for _ in range(10):
+        lim.on_success()
+    assert lim.rate == pytest.approx(10.0)
+
+
+def test_shared_rate_limiter_splits_budget_across_instances(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import secfetch.network.rate_limit as rl_mod
+    from secfetch.network.rate_limit import SharedRateLimiter
+
+    now = {"t": 1_000.0}
+    monkeypatch.setattr(rl_mod.time, "time", lambda: now["t"])
+
+    state = tmp_path / "rl.state"
+    # Two limiters on one state file behave like two processes on one host.
+    a = SharedRateLimiter(10.0, state_path=state, burst=2)
+    b = SharedRateLimiter(10.0, state_path=state, burst=2)
+    try:
+        assert a.reserve() == 0.0
+        assert b.reserve() == 0.0
+        assert a.reserve() == pytest.approx(0.1)
+        assert b.reserve() == pytest.approx(0.2)
+
+        now["t"] += 10.0
+        b.on_throttled()
+        assert a.rate == pytest.approx(5.0)
+    finally:
+        a.close()
+        b.close()
+
+
+def test_rerun_with_other_file_types_uses_cached_listing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+
+    cik = "1000045"
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik=cik, form_type="10-Q", date_filed="2024-01-02", accession=accession)
+    listing = {
+        "directory": {
+            "item": [
+                {"name": "doc.xml", "size": "6", "last-modified": "2024-01-02 16:05:12"},
+                {"name": "doc.htm", "size": "", "last-modified": "2024-01-02 16:05:12"},
+            ]
+        }
+    }
+    base_folder = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}/"
+    file_bytes = {base_folder + "doc.xml": b"<xml/>", base_folder + "doc.htm": b"<html/>"}
+    client = DummyClient(master_idx_text=master_idx, listing=listing, file_bytes=file_bytes)
+    listing_calls = {"n": 0}
+    orig_get_json = client.get_json
+
+    async def counting_get_json(url: str, **kwargs):
+        listing_calls["n"] += 1
+        return await orig_get_json(url)
+
+    client.get_json = counting_get_json  # type: ignore[method-assign]
+
+    from secfetch import download_quarter
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(dl_mod.SecClient, "from_env", classmethod(lambda cls, *, user_agent=None, data_dir=None: client))
+
+    for file_types in ([".xml"], [".htm"]):
+        res = download_quarter(
+            year=2024,
+            quarter=1,
+            forms=["10-Q"],
+            data_dir=data_dir,
+            file_types=file_types,
+            manifest_path=tmp_path / f"manifest{file_types[0]}.json",
+            show_progress=False,
+        )
+        assert res[0].status == "downloaded"
+
+    assert listing_calls["n"] == 1
+
+    from secfetch.storage.listing_cache import ListingCache
+
+    cache = ListingCache(data_dir / "_state" / "listings.sqlite3")
+    try:
+        assert cache.get(accession) == [
+            {"name": "doc.xml", "size": 6, "last_modified": "2024-01-02 16:05:12"},
+            {"name": "doc.htm", "size": None, "last_modified": "2024-01-02 16:05:12"},
+        ]
+    finally:
+        cache.close()
+
+
+def test_client_revalidates_cached_resource_with_conditional_get(tmp_path: Path) -> None:
+    import asyncio
+
+    import httpx
+
+    from secfetch.network.client import SecClient, SecClientConfig
+
+    seen_headers: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"name": "TEST CORP"}, headers={"ETag": '"v1"'})
+
+    async def run() -> list:
+        client = SecClient(SecClientConfig(user_agent="Test test@example.com", max_requests_per_second=1000))
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        url = "https://data.sec.gov/submissions/CIK0001000045.json"
+        cache = tmp_path / "CIK0001000045.json"
+        try:
+            return [await client.get_json(url, cache_path=cache) for _ in range(2)]
+        finally:
+            await client.aclose()
+
+    first, second = asyncio.run(run())
+    assert first == second == {"name": "TEST CORP"}
+    assert "if-none-match" not in seen_headers[0]
+    assert seen_headers[1]["if-none-match"] == '"v1"'
+
+
+def test_quarter_is_closed() -> None:
+    from datetime import date
+
+    from secfetch.index.master import quarter_is_closed
+
+    assert quarter_is_closed(year=2024, quarter=1, today=date(2024, 4, 30))
+    assert not quarter_is_closed(year=2024, quarter=1, today=date(2024, 4, 3))
+    assert not quarter_is_closed(year=2024, quarter=2, today=date(2024, 5, 1))
+
+
+def test_index_retention_evicts_lru_and_pins_closed_quarters(tmp_path: Path) -> None:
+    import os
+    from datetime import date
+
+    from secfetch import IndexRetention
+    from secfetch.index.retention import enforce_index_retention
+
+    data_dir = tmp_path / "data"
+    ages = {(2023, 4): 300, (2024, 1): 200, (2024, 2): 100}
+    for (year, quarter), age in ages.items():
+        p = data_dir / "index" / "master" / str(year) / f"QTR{quarter}" / "master.idx"
+        p.parent.mkdir(parents=True)
+        p.write_bytes(b"x" * 100)
+        os.utime(p, (1_000_000 - age, 1_000_000 - age))
+
+    today = date(2024, 5, 1)  # 2024 Q2 is still open
+    pinned = IndexRetention(policy="lru", max_bytes=150)
+    assert enforce_index_retention(data_dir, pinned, today=today, now=1_000_000) == [
+        data_dir / "index" / "master" / "2024" / "QTR2"
+    ]
+
+    unpinned = IndexRetention(policy="lru", max_bytes=150, pin_closed_quarters=False)
+    removed = enforce_index_retention(data_dir, unpinned, today=today, now=1_000_000)
+    assert removed == [data_dir / "index" / "master" / "2023" / "QTR4"]
+    assert (data_dir / "index" / "master" / "2024" / "QTR1" / "master.idx").exists()
+
+    with pytest.raises(ValueError):
+        IndexRetention(policy="lru")
+
+
+def test_parse_master_index_bytes_precomputes_accession_and_parses_dates_lazily() -> None:
+    from datetime import date
+
+    from secfetch.exceptions import MasterIndexParseError
+    from secfetch.index.master import MasterIndexRow, parse_master_index_bytes
+
+    text = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession="0001000045-24-000001")
+    text += "1000046|OTHER CORP|8-K|2024-13-40|edgar/data/1000046/0001000046-24-000002.txt\r\n"
+    rows = parse_master_index_bytes(text.encode("utf-8"))
+
+    assert [r.accession for r in rows] == ["0001000045-24-000001", "0001000046-24-000002"]
+    assert rows[0].date_filed == date(2024, 1, 2)
+    assert rows[0] == MasterIndexRow(
+        cik="1000045",
+        company_name="TEST CORP",
+        form_type="10-Q",
+        date_filed=date(2024, 1, 2),
+        filename="edgar/data/1000045/000100004524000001/0001000045-24-000001.txt",
+    )
+    # Invalid dates only surface when the date is actually needed.
+    assert rows[1].date_filed_str == "2024-13-40"
+    with pytest.raises(MasterIndexParseError):
+        _ = rows[1].date_filed
+
+
+def test_parse_master_index_pushes_down_form_and_cik_filters() -> None:
+    from secfetch.index.filter import FilingFilter
+    from secfetch.index.master import parse_master_index_bytes
+
+    text = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession="0001000045-24-000001")
+    text += "1000045|TEST CORP|10-Q/A|2024-01-03|edgar/data/1000045/0001000045-24-000002.txt\n"
+    text += "1000046|OTHER CORP|10-Q|2024-01-03|edgar/data/1000046/0001000046-24-000003.txt\n"
+    text += "1000046|OTHER CORP|8-K|2024-01-03|edgar/data/1000046/0001000046-24-000004.txt\n"
+    data = text.encode("utf-8")
+
+    forms = FilingFilter(forms=["10-Q", "10-Q/A"]).accepted_forms()
+    rows = parse_master_index_bytes(data, forms=forms, ciks={"0001000045"})
+    assert [r.accession for r in rows] == ["0001000045-24-000001"]
+
+    amended = FilingFilter(forms=["10-Q", "10-Q/A"], include_amended=True).accepted_forms()
+    assert len(parse_master_index_bytes(data, forms=amended)) == 3
+    assert parse_master_index_bytes(data, forms={"S-1"}) == []
+
+
+def test_columnar_index_selects_same_rows_as_text_parser(tmp_path: Path) -> None:
+    from datetime import date
+
+    from secfetch.index.columnar import ColumnarIndex, build_columnar_index, load_quarter_rows
+    from secfetch.index.filter import FilingFilter
+
+    text = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession="0001000045-24-000001")
+    text += "1000045|TEST CORP|8-K|2024-02-03|edgar/data/1000045/0001000045-24-000002.txt\n"
+    text += "1000046|ÜBER CORP|10-Q|2024-03-04|edgar/data/1000046/0001000046-24-000003.txt\n"
+    master = tmp_path / "master.idx"
+    master.write_bytes(text.encode("utf-8"))
+
+    col = build_columnar_index(master)
+    with ColumnarIndex.open(col) as idx:
+        assert len(idx) == 3
+        rows = idx.select(flt=FilingFilter(forms=["10-Q"]))
+        assert [(r.cik, r.company_name, r.accession, r.date_filed) for r in rows] == [
+            ("1000045", "TEST CORP", "0001000045-24-000001", date(2024, 1, 2)),
+            ("1000046", "ÜBER CORP", "0001000046-24-000003", date(2024, 3, 4)),
+        ]
+        assert rows[1].filename == "edgar/data/1000046/0001000046-24-000003.txt"
+        assert [r.accession for r in idx.select(cik_set={"0001000045"}, start=date(2024, 2, 1))] == [
+            "0001000045-24-000002"
+        ]
+        assert idx.select(flt=FilingFilter(forms=["S-1"])) == []
+
+    # A grown master.idx invalidates the columnar file; an open quarter is parsed
+    # directly (push-down, date-filtered) instead of rebuilding it.
+    master.write_bytes(master.read_bytes() + b"1000047|NEW CORP|10-Q|2024-03-05|edgar/data/1000047/0001000047-24-000004.txt\n")
+    stale = col.read_bytes()
+    open_rows = load_quarter_rows(master, flt=FilingFilter(forms=["10-Q"]), start=date(2024, 3, 1), build=False)
+    assert [r.accession for r in open_rows] == ["0001000046-24-000003", "0001000047-24-000004"]
+    assert col.read_bytes() == stale
+    assert len(load_quarter_rows(master, flt=FilingFilter(forms=["10-Q"]))) == 3
+    assert col.read_bytes() != stale
+
+
+def test_master_index_prefers_gzip_and_falls_back_to_plain(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncio
+
+    import httpx
+
+    import secfetch.network.client as client_mod
+    from secfetch.index.master import download_master_index
+    from secfetch.network.client import SecClient, SecClientConfig
+
+    text = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession="0001000045-24-000001")
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path.rsplit("/", 1)[1])
+        if request.url.path.endswith("/2024/QTR1/master.gz"):
+            return httpx.Response(200, content=gzip.compress(text.encode("utf-8")))
+        if request.url.path.endswith("/2024/QTR2/master.gz"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=text.encode("utf-8"))
+
+    async def no_sleep(_s: float) -> None:
+        return None
+
+    monkeypatch.setattr(client_mod.asyncio, "sleep", no_sleep)
+
+    async def run() -> list[Path]:
+        client = SecClient(SecClientConfig(user_agent="Test test@example.com", max_requests_per_second=1000))
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return [
+                await download_master_index(client, data_dir=tmp_path, year=2024, quarter=q, force=True)
+                for q in (1, 2)
+            ]
+        finally:
+            await client.aclose()
+
+    q1, q2 = asyncio.run(run())
+    assert q1.read_text() == text
+    assert q2.read_text() == text
+    # The 404 on the compressed variant is not retried.
+    assert requested == ["master.gz", "master.gz", "master.idx"]
+
+
+class DailyDummyClient(DummyClient):
+    """Serves a daily-index folder listing plus the per-day master files."""
+
+    def __init__(self, *, day_files: dict[str, str], listing: dict, file_bytes: dict[str, bytes]):
+        super().__init__(master_idx_text="", listing=listing, file_bytes=file_bytes)
+        self._day_files = day_files
+        self.fetched: list[str] = []
+
+    async def get_bytes(self, url: str) -> bytes:
+        name = url.rsplit("/", 1)[1]
+        if name in self._day_files:
+            self.fetched.append(name)
+            return self._day_files[name].encode("utf-8")
+        return await super().get_bytes(url)
+
+    async def get_json(self, url: str, **kwargs):
+        if "/daily-index/" in url:
+            return {"directory": {"item": [{"name": n} for n in self._day_files] + [{"name": "form.20240102.idx"}]}}
+        return await super().get_json(url)
+
+
+def test_daily_download_only_fetches_days_after_sync_point(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from datetime import date
+
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["8-K"])
+
+    def day_file(cik: str, accession: str, day: str) -> str:
+        text = _master_idx_one_row(cik=cik, form_type="8-K", date_filed=day, accession=accession)
+        # Daily files use a "File Name" header and YYYYMMDD dates.
+        return text.replace("|Filename", "|File Name")
+
+    day_files = {
+        "master.20240102.idx": day_file("1000045", "0001000045-24-000001", "20240102"),
+        "master.20240103.idx": day_file("1000046", "0001000046-24-000002", "20240103"),
+    }
+    listing = {"directory": {"item": [{"name": "doc.htm"}]}}
+    file_bytes = {
+        "https://www.sec.gov/Archives/edgar/data/1000045/000100004524000001/doc.htm": b"a",
+        "https://www.sec.gov/Archives/edgar/data/1000046/000100004624000002/doc.htm": b"b",
+    }
+    client = DailyDummyClient(day_files=day_files, listing=listing, file_bytes=file_bytes)
+
+    from secfetch import download_daily
+    from secfetch.index.daily import load_last_synced, save_last_synced
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(dl_mod.SecClient, "from_env", classmethod(lambda cls, *, user_agent=None, data_dir=None: client))
+    save_last_synced(data_dir, date(2024, 1, 2))
+
+    res = download_daily(forms=["8-K"], until=date(2024, 1, 5), data_dir=data_dir, file_types=[".htm"], show_progress=False)
+
+    assert [(r.accession, r.date_filed, r.status) for r in res] == [
+        ("0001000046-24-000002", date(2024, 1, 3), "downloaded")
+    ]
+    assert client.fetched == ["master.20240103.idx"]
+    assert load_last_synced(data_dir) == date(2024, 1, 3)
+
+
+def test_plan_index_files_uses_daily_files_for_short_slices(tmp_path: Path) -> None:
+    from datetime import date
+
+    from secfetch.index.plan import plan_index_files
+
+    plan = plan_index_files(date(2019, 3, 25), date(2019, 7, 3), today=date(2024, 1, 1))
+    assert [(p.year, p.quarter, p.start, p.end) for p in plan.quarterly] == [(2019, 2, date(2019, 4, 1), date(2019, 6, 30))]
+    assert [(p.quarter, p.start, p.end) for p in plan.daily] == [
+        (1, date(2019, 3, 25), date(2019, 3, 31)),
+        (3, date(2019, 7, 1), date(2019, 7, 3)),
+    ]
+
+    # A cached, closed quarter index is free, so it wins over daily files.
+    cached = tmp_path / "index" / "master" / "2019" / "QTR1" / "master.idx"
+    cached.parent.mkdir(parents=True)
+    cached.write_text("x")
+    plan = plan_index_files(date(2019, 3, 25), date(2019, 3, 31), data_dir=tmp_path, today=date(2024, 1, 1))
+    assert [p.quarter for p in plan.quarterly] == [1] and plan.daily == []
+
+
+def test_download_range_filters_rows_by_date(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession="0001000045-24-000001")
+    master_idx += "1000046|OTHER CORP|10-Q|2024-03-01|edgar/data/1000046/0001000046-24-000002.txt\n"
+    listing = {"directory": {"item": [{"name": "doc.xml"}]}}
+    file_bytes = {"https://www.sec.gov/Archives/edgar/data/1000045/000100004524000001/doc.xml": b"<xml/>"}
+
+    from secfetch import download_range
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes=file_bytes)),
+    )
+
+    res = download_range(
+        start="2024-01-01",
+        end="2024-02-15",
+        forms=["10-Q"],
+        data_dir=data_dir,
+        file_types=[".xml"],
+        show_progress=False,
+    )
+    assert [(r.accession, r.status) for r in res] == [("0001000045-24-000001", "downloaded")]
+
+
+def test_download_year_queues_quarters_in_one_pipeline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+
+    accessions = {q: f"0001000045-23-00000{q}" for q in (1, 2, 3, 4)}
+    indexes = {
+        q: _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed=f"2023-{3 * q:02d}-01", accession=acc)
+        for q, acc in accessions.items()
+    }
+    listing = {"directory": {"item": [{"name": "doc.xml"}]}}
+    file_bytes = {
+        f"https://www.sec.gov/Archives/edgar/data/1000045/{acc.replace('-', '')}/doc.xml": b"<xml/>"
+        for acc in accessions.values()
+    }
+
+    class YearClient(DummyClient):
+        async def get_bytes(self, url: str) -> bytes:
+            if "/full-index/" in url:
+                quarter = int(url.split("/QTR")[1][0])
+                return gzip.compress(indexes[quarter].encode("utf-8"))
+            return await super().get_bytes(url)
+
+    from secfetch import download_year
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: YearClient(master_idx_text="", listing=listing, file_bytes=file_bytes)),
+    )
+    progress: list[tuple[int, int]] = []
+
+    res = download_year(
+        year=2023,
+        forms=["10-Q"],
+        data_dir=data_dir,
+        file_types=[".xml"],
+        concurrency=2,
+        on_progress=lambda done, total, result, active: progress.append((done, total)),
+    )
+    assert [r.accession for r in res] == [accessions[q] for q in (1, 2, 3, 4)]
+    assert all(r.status == "downloaded" for r in res)
+    assert progress[-1] == (4, 4)
+
+
+def test_download_year_tar_shares_one_client_and_global_limit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import io
+
+    import httpx
+
+    import secfetch.api as api_mod
+    from secfetch import download_year_tar, query_catalog
+
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+    accessions = {q: f"0001000045-23-00000{q}" for q in (1, 2, 3, 4)}
+    indexes = {
+        q: _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed=f"2023-{3 * q:02d}-01", accession=acc)
+        for q, acc in accessions.items()
+    }
+
+    class YearClient(DummyClient):
+        async def get_bytes(self, url: str) -> bytes:
+            return gzip.compress(indexes[int(url.split("/QTR")[1][0])].encode("utf-8"))
+
+    monkeypatch.setattr(
+        api_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: YearClient(master_idx_text="", listing={}, file_bytes={})),
+    )
+
+    def tar_bytes() -> bytes:
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tf:
+            info = tarfile.TarInfo("doc.xml")
+            info.size = 6
+            tf.addfile(info, io.BytesIO(b"<xml/>"))
+        return buf.getvalue()
+
+    requested: list[str] = []
+    clients: list[int] = []
+    real_client = httpx.AsyncClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path)
+        return httpx.Response(200, content=tar_bytes())
+
+    def make_client(**kwargs):
+        clients.append(1)
+        return real_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(api_mod.httpx, "AsyncClient", make_client)
+
+    res = download_year_tar(year=2023, forms=["10-Q"], data_dir=data_dir, limit=3, show_progress=False)
+
+    assert [r.accession for r in res] == [accessions[q] for q in (1, 2, 3)]
+    assert all(r.status == "downloaded" for r in res)
+    assert len(clients) == 1
+    assert len(requested) == 3
+    assert (data_dir / "filings" / "10-Q" / "0001000045" / accessions[3] / "doc.xml").read_bytes() == b"<xml/>"
+
+    # Extracted datamule filings land in the catalog like index-driven ones.
+    entries = query_catalog(data_dir=data_dir, forms=["10-Q"])
+    assert [e.accession for e in entries] == [accessions[q] for q in (1, 2, 3)]
+    assert entries[2].output_path == str(data_dir / "filings" / "10-Q" / "0001000045" / accessions[3])
+    assert entries[2].files == (("doc.xml", 6),)
+
+
+def test_datamule_tar_pipeline_caps_in_flight_downloads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncio
+    from datetime import date
+
+    import httpx
+
+    import secfetch.api as api_mod
+    from secfetch.index.master import MasterIndexRow
+
+    rows = [
+        MasterIndexRow(
+            cik="1000045",
+            company_name="TEST CORP",
+            form_type="8-K",
+            date_filed=date(2024, 1, 2),
+            filename=f"edgar/data/1000045/0001000045-24-{i:06d}.txt",
+        )
+        for i in range(40)
+    ]
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0)
+        active -= 1
+        return httpx.Response(200, content=b"tar")
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        api_mod.httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw)
+    )
+
+    res = asyncio.run(
+        api_mod._download_datamule_tars_async(
+            rows=rows, out_dir=tmp_path / "tars", api_key=None, show_progress=False, concurrency=3
+        )
+    )
+    assert [r.accession for r in res] == [r.accession for r in rows]
+    assert all(r.status == "downloaded" for r in res)
+    assert 1 <= peak <= 3
+
+
+def test_files_of_one_filing_are_fetched_by_several_workers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncio
+
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-K"])
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-K", date_filed="2024-01-02", accession=accession)
+    names = [f"ex{i}.htm" for i in range(12)]
+    listing = {"directory": {"item": [{"name": n} for n in names]}}
+    base = f"https://www.sec.gov/Archives/edgar/data/1000045/{accession.replace('-', '')}/"
+    file_bytes = {base + n: n.encode() for n in names}
+    active = 0
+    peak = 0
+
+    class SlowClient(DummyClient):
+        async def download_to_path(self, url: str, path: Path, **kwargs) -> int:
+            nonlocal active, peak
+            if "/full-index/" in url:
+                return await super().download_to_path(url, path, **kwargs)
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+            return await super().download_to_path(url, path, **kwargs)
+
+    from secfetch import download_quarter
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: SlowClient(master_idx_text=master_idx, listing=listing, file_bytes=file_bytes)),
+    )
+    res = download_quarter(year=2024, quarter=1, forms=["10-K"], data_dir=data_dir, file_types=[".htm"], concurrency=4)
+
+    assert [r.status for r in res] == ["downloaded"]
+    assert peak == 4
+    out = data_dir / "filings" / "10-K" / "0001000045" / accession
+    assert sorted(p.name for p in out.iterdir()) == sorted(names)
+
+
+def test_listing_and_file_stages_have_separate_concurrency(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncio
+
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["8-K"])
+    accessions = [f"0001000045-24-{i:06d}" for i in range(6)]
+    master_idx = "\n".join(
+        ["CIK|Company Name|Form Type|Date Filed|Filename", "-" * 40]
+        + [f"1000045|TEST CORP|8-K|2024-01-02|edgar/data/1000045/{a}.txt" for a in accessions]
+        + [""]
+    )
+    listing = {"directory": {"item": [{"name": f"ex{i}.htm"} for i in range(3)]}}
+    active = {"listing": 0, "file": 0}
+    peak = {"listing": 0, "file": 0}
+
+    async def track(kind: str, seconds: float) -> None:
+        active[kind] += 1
+        peak[kind] = max(peak[kind], active[kind])
+        await asyncio.sleep(seconds)
+        active[kind] -= 1
+
+    class StagedClient(DummyClient):
+        async def get_json(self, url: str, **kwargs):
+            await track("listing", 0)
+            return self._listing
+
+        async def download_to_path(self, url: str, path: Path, **kwargs) -> int:
+            if "/full-index/" in url:
+                return await super().download_to_path(url, path, **kwargs)
+            await track("file", 0.002)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x")
+            return 1
+
+    from secfetch import download_quarter
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: StagedClient(master_idx_text=master_idx, listing=listing, file_bytes={})),
+    )
+    res = download_quarter(
+        year=2024, quarter=1, forms=["8-K"], data_dir=data_dir, file_types=[".htm"], concurrency=4, listing_concurrency=1
+    )
+
+    assert [r.accession for r in res] == accessions
+    assert all(r.status == "downloaded" for r in res)
+    assert peak["listing"] == 1
+    assert peak["file"] == 4
+
+
+def test_adaptive_concurrency_grows_backs_off_and_respects_rate_cap() -> None:
+    import asyncio
+
+    from secfetch.network.concurrency import AdaptiveConcurrency, RequestStats
+
+    stats = RequestStats()
+    clock = {"t": 0.0}
+    cap = {"rps": 100.0}
+    ctl = AdaptiveConcurrency(stats, initial=2, maximum=8, rate_cap=lambda: cap["rps"], window=1.0, clock=lambda: clock["t"])
+
+    def window(*, requests: int, throttled: int = 0, latency: float = 0.1, blocked: bool = True) -> int:
+        stats.requests += requests
+        stats.throttled += throttled
+        stats.bytes += requests * 10_000
+        stats.latency_seconds += (requests - throttled) * latency
+        ctl._blocked = blocked
+        clock["t"] += 1.0
+        ctl.observe()
+        return ctl.limit
+
+    # Limit is the bottleneck and throughput keeps rising: additive increase.
+    assert [window(requests=n) for n in (10, 15, 20)] == [3, 4, 5]
+    # A 429 in the window halves the limit.
+    assert window(requests=20, throttled=1) == 3
+    # Already sending at the rate cap: more in flight would only queue.
+    cap["rps"] = 20.0
+    assert window(requests=20) == 3
+    # Latency doubling over the best seen means requests are queueing somewhere.
+    cap["rps"] = 100.0
+    assert window(requests=20, latency=0.5) == 2
+    # Timeouts and connection resets are congestion too.
+    stats.transport_errors += 1
+    assert window(requests=20) == 1
+
+    async def gate() -> int:
+        peak = 0
+
+        async def one() -> None:
+            nonlocal peak
+            async with ctl:
+                peak = max(peak, ctl.in_flight)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[one() for _ in range(6)])
+        return peak
+
+    assert asyncio.run(gate()) == 1
+
+
+def test_throttled_filing_is_deferred_without_stalling_others(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from secfetch import download_quarter, retry_deferred
+    import secfetch.downloader as dl_mod
+    from secfetch.exceptions import RetryLaterError
+
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["8-K"])
+    slow, fast = "0001000045-24-000001", "0001000045-24-000002"
+    master_idx = "\n".join(
+        ["CIK|Company Name|Form Type|Date Filed|Filename", "-" * 40]
+        + [f"1000045|TEST CORP|8-K|2024-01-02|edgar/data/1000045/{a}.txt" for a in (slow, fast)]
+        + [""]
+    )
+    listing = {"directory": {"item": [{"name": "doc.htm"}]}}
+    throttle = {"on": True}
+    calls: list[str] = []
+
+    class ThrottlingClient(DummyClient):
+        async def download_to_path(self, url: str, path: Path, **kwargs) -> int:
+            if "/full-index/" in url:
+                return await super().download_to_path(url, path, **kwargs)
+            calls.append(url)
+            if throttle["on"] and slow.replace("-", "") in url:
+                assert kwargs.get("defer_retries")
+                raise RetryLaterError("429 rate limited", retry_after=0.0)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"<html/>")
+            return 7
+
+    async def no_sleep(_s: float) -> None:
+        return None
+
+    monkeypatch.setattr(dl_mod.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: ThrottlingClient(master_idx_text=master_idx, listing=listing, file_bytes={})),
+    )
+
+    res = download_quarter(year=2024, quarter=1, forms=["8-K"], data_dir=data_dir, file_types=[".htm"], concurrency=1)
+    assert [(r.accession, r.status) for r in res] == [(slow, "deferred"), (fast, "downloaded")]
+    # The fast filing went through while the slow one's retries were parked.
+    slow_calls = [i for i, c in enumerate(calls) if slow.replace("-", "") in c]
+    fast_call = next(i for i, c in enumerate(calls) if fast.replace("-", "") in c)
+    assert len(slow_calls) == dl_mod._MAX_DEFERRED_ATTEMPTS
+    assert fast_call < slow_calls[-1]
+    queued = json.loads((data_dir / "_state" / "retry.json").read_text())
+    assert list(queued) == [slow]
+
+    throttle["on"] = False
+    res = retry_deferred(data_dir=data_dir, file_types=[".htm"], show_progress=False)
+    assert [(r.accession, r.status) for r in res] == [(slow, "downloaded")]
+    assert json.loads((data_dir / "_state" / "retry.json").read_text()) == {}
+
+
+def test_partial_filing_resumes_with_only_missing_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-K"])
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-K", date_filed="2024-01-02", accession=accession)
+    bodies = {"a.htm": b"aaaa", "b.htm": b"bbbbbb", "c.htm": b"cc"}
+    listing = {"directory": {"item": [{"name": n, "size": str(len(b))} for n, b in bodies.items()]}}
+    base = f"https://www.sec.gov/Archives/edgar/data/1000045/{accession.replace('-', '')}/"
+    fail = {"b.htm"}
+    fetched: list[str] = []
+
+    class FlakyClient(DummyClient):
+        async def download_to_path(self, url: str, path: Path, **kwargs) -> int:
+            if "/full-index/" in url:
+                return await super().download_to_path(url, path, **kwargs)
+            assert url.startswith(base)
+            name = url.rsplit("/", 1)[1]
+            fetched.append(name)
+            if name in fail:
+                raise OSError("connection reset")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(bodies[name])
+            return len(bodies[name])
+
+    from secfetch import download_quarter
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: FlakyClient(master_idx_text=master_idx, listing=listing, file_bytes={})),
+    )
+
+    def run() -> list:
+        return download_quarter(year=2024, quarter=1, forms=["10-K"], data_dir=data_dir, file_types=[".htm"], concurrency=1)
+
+    assert [r.status for r in run()] == ["error"]
+    tmp_dir = data_dir / "filings" / "10-K" / "0001000045" / f"{accession}.tmp"
+    assert sorted(p.name for p in tmp_dir.iterdir()) == ["a.htm", "c.htm"]
+    (tmp_dir / "c.htm").write_bytes(b"c")  # truncated copy: size no longer matches the listing
+
+    fail.clear()
+    fetched.clear()
+    assert [r.status for r in run()] == ["downloaded"]
+    assert sorted(fetched) == ["b.htm", "c.htm"]
+    out = data_dir / "filings" / "10-K" / "0001000045" / accession
+    assert {p.name: p.read_bytes() for p in out.iterdir()} == bodies
+    assert not tmp_dir.exists()
+
+
+def test_manifest_journals_upserts_and_replays_after_crash(tmp_path: Path) -> None:
+    from secfetch.storage.manifest import Manifest, ManifestEntry
+
+    path = tmp_path / "_state" / "manifest.json"
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps({"A": {"form_type": "10-K", "cik": "0000000001", "date_filed": "2024-01-02"}}))
+
+    def entry(acc: str, strategy: str = "index") -> ManifestEntry:
+        return ManifestEntry(accession=acc, form_type="8-K", cik="0000000002", date_filed="2024-01-03", strategy=strategy)
+
+    m = Manifest(path, compact_min=10)
+    m.load()
+    m.upsert(entry("B"))
+    m.upsert(entry("A", "index_tar"))
+    # No save/close: simulate a crash that also tore the last journal line.
+    with m.journal_path.open("a") as f:
+        f.write('{"accession": "C", "form')
+
+    replayed = Manifest(path, compact_min=10)
+    replayed.load()
+    assert len(replayed) == 2
+    assert replayed.get("A").strategy == "index_tar"
+    assert replayed.get("B") == entry("B")
+    assert json.loads(path.read_text()).keys() == {"A"}  # snapshot untouched by upserts
+
+    for i in range(8):
+        replayed.upsert(entry(f"X{i}"))
+    # Journal outgrew the snapshot: folded in and truncated.
+    assert replayed.journal_path.stat().st_size == 0
+    assert len(json.loads(path.read_text())) == 10
+    replayed.close()
+
+
+def test_manifest_append_after_torn_journal_line_survives_reload(tmp_path: Path) -> None:
+    from secfetch.storage.manifest import Manifest, ManifestEntry
+
+    path = tmp_path / "_state" / "manifest.json"
+
+    def entry(acc: str) -> ManifestEntry:
+        return ManifestEntry(accession=acc, form_type="8-K", cik="0000000002", date_filed="2024-01-03", strategy="index")
+
+    m = Manifest(path)
+    m.load()
+    m.upsert(entry("A"))
+    m.save_atomic()  # snapshot exists; later upserts only go to the journal
+    m.upsert(entry("B"))
+    m.close()
+    # Crash mid-append tears the last line.
+    with m.journal_path.open("a") as f:
+        f.write('{"accession":"T","form')
+
+    restarted = Manifest(path)
+    restarted.load()
+    assert m.journal_path.read_bytes().endswith(b"\n")
+    restarted.upsert(entry("C"))
+    restarted.close()
+
+    reloaded = Manifest(path)
+    reloaded.load()
+    assert {acc for acc in ("A", "B", "C", "T") if reloaded.has(acc)} == {"A", "B", "C"}
+
+
+def test_manifest_compaction_keeps_other_writers_appends(tmp_path: Path) -> None:
+    from secfetch.storage.manifest import Manifest, ManifestEntry
+
+    path = tmp_path / "_state" / "manifest.json"
+
+    def entry(acc: str) -> ManifestEntry:
+        return ManifestEntry(accession=acc, form_type="8-K", cik="0000000002", date_filed="2024-01-03", strategy="index")
+
+    # Two jobs sharing one data_dir, each with its own Manifest over the same files.
+    a, b = Manifest(path), Manifest(path)
+    a.load()
+    b.load()
+    a.upsert(entry("A"))
+    b.upsert(entry("B"))
+    b.compact()  # must fold in A, which b never loaded
+    assert json.loads(path.read_text()).keys() == {"A", "B"}
+    assert b.has("A")
+    a.upsert(entry("C"))  # a's open journal handle still lands in the live file
+    a.close()
+    b.close()
+
+    reloaded = Manifest(path)
+    reloaded.load()
+    assert {acc for acc in ("A", "B", "C") if reloaded.has(acc)} == {"A", "B", "C"}
+    reloaded.close()
+
+
+def test_catalog_records_committed_filings_and_answers_queries(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession=accession)
+    listing = {"directory": {"item": [{"name": "doc.xml"}, {"name": "doc.htm"}]}}
+    base = f"https://www.sec.gov/Archives/edgar/data/1000045/{accession.replace('-', '')}/"
+    file_bytes = {base + "doc.xml": b"<xml/>", base + "doc.htm": b"<html/>"}
+
+    from secfetch import download_quarter, query_catalog
+    from secfetch.cli import main
+    from secfetch.storage.catalog import Catalog
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes=file_bytes)),
+    )
+    download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml", ".htm"], show_progress=False)
+
+    [entry] = query_catalog(data_dir=data_dir, forms=["10-Q"], cik=1000045, start="2024-01-01", end="2024-03-31")
+    assert entry.accession == accession
+    assert entry.cik == "0001000045"
+    assert dict(entry.files) == {"doc.xml": 6, "doc.htm": 7}
+    assert entry.total_bytes == 13
+    assert entry.output_path == str(data_dir / "filings" / "10-Q" / "0001000045" / accession)
+    assert query_catalog(data_dir=data_dir, start="2024-01-03") == []
+    assert query_catalog(data_dir=data_dir, forms=["8-K"]) == []
+
+    assert main(["catalog", "--data-dir", str(data_dir), "--forms", "10-Q"]) == 0
+    printed = json.loads(capsys.readouterr().out)
+    assert [e["accession"] for e in printed] == [accession]
+
+    # Re-runs decide to skip from the catalog.
+    res = download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml"], show_progress=False)
+    assert [(r.status, r.output_dir) for r in res] == [("skipped", entry.output_path)]
+
+    # Cataloged under another tree only: fetched again for this one, and the row follows.
+    catalog = Catalog(data_dir / "_state" / "catalog.sqlite3")
+    catalog.rewrite_paths(lambda p: str(tmp_path / "elsewhere" / accession))
+    catalog.close()
+    shutil.rmtree(entry.output_path)
+    res = download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml", ".htm"], show_progress=False)
+    assert [r.status for r in res] == ["downloaded"]
+    assert [e.output_path for e in query_catalog(data_dir=data_dir)] == [entry.output_path]
+
+
+def test_plan_splits_work_without_fetching_filings(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession=accession)
+    listing = {"directory": {"item": [{"name": "doc.xml"}]}}
+    base = f"https://www.sec.gov/Archives/edgar/data/1000045/{accession.replace('-', '')}/"
+
+    import asyncio
+
+    from secfetch import download_quarter
+    from secfetch.cli import main
+    from secfetch.downloader import FilingDownloader
+    from secfetch.index.master import MasterIndexRow
+    from secfetch.storage.listing_cache import ListingCache
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes={base + "doc.xml": b"<xml/>"})),
+    )
+    download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml"], show_progress=False)
+
+    class IndexOnlyClient(DummyClient):
+        async def get_json(self, url: str, **kwargs):
+            raise AssertionError(f"dry run fetched {url}")
+
+        async def download_to_path(self, url: str, path: Path, **kwargs) -> int:
+            assert url.endswith(("master.idx", "master.gz")), f"dry run fetched {url}"
+            return await super().download_to_path(url, path, **kwargs)
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: IndexOnlyClient(master_idx_text=master_idx, listing=listing, file_bytes={})),
+    )
+    assert main(["quarter", "--year", "2024", "--quarter", "1", "--forms", "10-Q", "--data-dir", str(data_dir), "--file-types", ".xml", "--dry-run"]) == 0
+    assert json.loads(capsys.readouterr().out) == {"to_fetch": 0, "already_have": 1, "estimated_bytes": 0, "unsized": 0}
+
+    def row(n: int) -> MasterIndexRow:
+        acc = f"0001000045-24-00000{n}"
+        return MasterIndexRow(
+            cik="1000045",
+            company_name="TEST CORP",
+            form_type="10-Q",
+            date_filed="2024-01-02",
+            filename=f"edgar/data/1000045/{acc.replace('-', '')}/{acc}.txt",
+        )
+
+    cache = ListingCache(data_dir / "_state" / "listings.sqlite3")
+    cache.put(row(2).accession, [{"name": "a.xml", "size": 100}, {"name": "b.xml", "size": 20}, {"name": "c.pdf", "size": 999}])
+    cache.close()
+
+    dl = FilingDownloader(forms=["10-Q"], data_dir=data_dir, file_types=[".xml"])
+    plan = dl.plan([row(1), row(2), row(3), row(2)])
+    assert [r.accession for r in plan.already_have] == [accession]
+    assert [r.accession for r in plan.to_fetch] == [row(2).accession, row(3).accession]
+    assert plan.estimated_bytes == 120
+    assert plan.unsized == 1
+
+    # Cataloged for another output tree and missing from this one: still to fetch.
+    dl._catalog.rewrite_paths(lambda p: str(tmp_path / "elsewhere" / accession))
+    shutil.rmtree(data_dir / "filings" / "10-Q" / "0001000045" / accession)
+    assert [r.accession for r in dl.plan([row(1)]).to_fetch] == [accession]
+    asyncio.run(dl.aclose())
+
+
+def test_dedup_hardlinks_identical_documents_across_filings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+    accessions = ["0001000045-24-000001", "0001000045-24-000002"]
+    master_idx = "\n".join(
+        ["CIK|Company Name|Form Type|Date Filed|Filename", "-" * 40]
+        + [f"1000045|TEST CORP|10-Q|2024-01-02|edgar/data/1000045/{a}.txt" for a in accessions]
+        + [""]
+    )
+    listing = {"directory": {"item": [{"name": "schema.xsd"}, {"name": "doc.htm"}]}}
+    file_bytes = {}
+    for n, acc in enumerate(accessions):
+        base = f"https://www.sec.gov/Archives/edgar/data/1000045/{acc.replace('-', '')}/"
+        file_bytes[base + "schema.xsd"] = b"<xs:schema/>"
+        file_bytes[base + "doc.htm"] = f"<html>{n}</html>".encode()
+
+    from secfetch import download_quarter
+    import secfetch.downloader as dl_mod
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes=file_bytes)),
+    )
+    res = download_quarter(
+        year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xsd", ".htm"], dedup=True, show_progress=False
+    )
+    assert [r.status for r in res] == ["downloaded", "downloaded"]
+
+    first, second = (data_dir / "filings" / "10-Q" / "0001000045" / acc for acc in accessions)
+    assert (first / "schema.xsd").stat().st_ino == (second / "schema.xsd").stat().st_ino
+    assert (first / "doc.htm").stat().st_ino != (second / "doc.htm").stat().st_ino
+    assert (second / "doc.htm").read_bytes() == b"<html>1</html>"
+    blobs = [p for p in (data_dir / "_blobs").rglob("*") if p.is_file()]
+    assert len(blobs) == 3
+    digest = hashlib.sha256(b"<xs:schema/>").hexdigest()
+    assert (data_dir / "_blobs" / digest[:2] / digest[2:4] / digest).stat().st_nlink == 3
+
+
+def test_layout_migration_fans_out_filings_and_downloads_follow(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-Q", date_filed="2024-01-02", accession=accession)
+    listing = {"directory": {"item": [{"name": "doc.xml"}]}}
+    base = f"https://www.sec.gov/Archives/edgar/data/1000045/{accession.replace('-', '')}/"
+
+    import secfetch.downloader as dl_mod
+    from secfetch import download_quarter, migrate_layout, query_catalog
+    from secfetch.cli import main
+    from secfetch.storage.layout import FilingLayout
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes={base + "doc.xml": b"<xml/>"})),
+    )
+    download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml"], show_progress=False)
+    group = data_dir / "filings" / "10-Q" / "0001000045"
+    assert (group / accession / "doc.xml").exists()
+
+    assert main(["layout", "--fanout", "2", "--data-dir", str(data_dir)]) == 0
+    assert json.loads(capsys.readouterr().out)["moved"] == 1
+    sharded = FilingLayout(fanout=2).place(group, accession)
+    assert sharded.parent.parent.parent == group
+    assert (sharded / "doc.xml").read_bytes() == b"<xml/>"
+    assert not (group / accession).exists()
+    [entry] = query_catalog(data_dir=data_dir)
+    assert entry.output_path == str(sharded)
+
+    # Downloads resolve paths through the recorded layout.
+    res = download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml"], show_progress=False)
+    assert [r.status for r in res] == ["skipped"]
+    shutil.rmtree(sharded)
+    (data_dir / "_state" / "catalog.sqlite3").unlink()
+    res = download_quarter(year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml"], show_progress=False)
+    assert [r.status for r in res] == ["downloaded"]
+    assert (sharded / "doc.xml").exists()
+
+    assert migrate_layout(data_dir=data_dir, fanout=0) == 1
+    assert (group / accession / "doc.xml").exists()
+    assert [p.name for p in group.iterdir()] == [accession]
+
+
+def test_legacy_amended_form_tars_are_adopted_and_migrated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q/A"])
+    accession = "0001000045-24-000001"
+    master_idx = _master_idx_one_row(cik="1000045", form_type="10-Q/A", date_filed="2024-01-02", accession=accession)
+    listing = {"directory": {"item": [{"name": "doc.xml"}]}}
+
+    import secfetch.downloader as dl_mod
+    from secfetch import download_quarter_tar, migrate_layout, query_catalog
+    from secfetch.storage.catalog import Catalog, CatalogEntry
+    from secfetch.storage.layout import FilingLayout
+    from secfetch.storage.manifest import Manifest, ManifestEntry
+
+    # Tars of "10-Q/A" used to be stored under the raw form type: filings_tar/10-Q/A/<cik>.
+    legacy = data_dir / "filings_tar" / "10-Q" / "A" / "0001000045"
+    legacy.mkdir(parents=True)
+    (tmp_path / "doc.xml").write_bytes(b"<xml/>")
+    with tarfile.open(legacy / f"{accession}.tar", mode="w") as tf:
+        tf.add(tmp_path / "doc.xml", arcname="doc.xml")
+    manifest = Manifest(data_dir / "_state" / "manifest.json")
+    manifest.load()
+    manifest.upsert(
+        ManifestEntry(accession=accession, form_type="10-Q/A", cik="0001000045", date_filed="2024-01-02", strategy="index_tar")
+    )
+    manifest.close()
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes={})),
+    )
+    res = download_quarter_tar(
+        year=2024, quarter=1, forms=["10-Q/A"], data_dir=data_dir, file_types=[".xml"], include_amended=True,
+        tar_provider="local", show_progress=False,
+    )
+    # Found at the old path and moved into place instead of fetched again.
+    group = data_dir / "filings_tar" / "10-Q_A" / "0001000045"
+    assert [(r.status, r.output_dir) for r in res] == [("skipped", str(group / f"{accession}.tar"))]
+    assert not (legacy / f"{accession}.tar").exists()
+
+    # Cataloged by an older run at the old path: migrate_layout moves it along.
+    other = "0001000045-24-000002"
+    (legacy / f"{other}.tar").write_bytes(b"")
+    catalog = Catalog(data_dir / "_state" / "catalog.sqlite3")
+    catalog.record(
+        CatalogEntry(
+            accession=other, cik="0001000045", form_type="10-Q/A", date_filed="2024-01-03",
+            output_format="tar", output_path=str(legacy / f"{other}.tar"), files=(),
+        )
+    )
+    catalog.close()
+
+    assert migrate_layout(data_dir=data_dir, fanout=1) == 2
+    layout = FilingLayout(fanout=1)
+    paths = {e.accession: e.output_path for e in query_catalog(data_dir=data_dir)}
+    assert paths == {
+        accession: str(layout.place(group, accession, f"{accession}.tar")),
+        other: str(layout.place(group, other, f"{other}.tar")),
+    }
+    assert all(Path(p).exists() for p in paths.values())
+    assert not (data_dir / "filings_tar" / "10-Q").exists()
+
+
+def test_corrupt_legacy_tar_fails_only_its_filing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    _write_accepted_forms(data_dir, ["10-Q"])
+    accessions = ["0001000045-24-000001", "0001000045-24-000002"]
+    master_idx = "\n".join(
+        ["CIK|Company Name|Form Type|Date Filed|Filename", "-" * 40]
+        + [f"1000045|TEST CORP|10-Q|2024-01-02|edgar/data/1000045/{a}.txt" for a in accessions]
+        + [""]
+    )
+    listing = {"directory": {"item": [{"name": "doc.xml"}]}}
+    file_bytes = {
+        f"https://www.sec.gov/Archives/edgar/data/1000045/{a.replace('-', '')}/doc.xml": b"<xml/>" for a in accessions
+    }
+
+    import secfetch.downloader as dl_mod
+    from secfetch import download_quarter_tar
+    from secfetch.storage.manifest import Manifest, ManifestEntry
+
+    # Committed before the catalog existed, and the tar has since been corrupted.
+    manifest = Manifest(data_dir / "_state" / "manifest.json")
+    manifest.load()
+    manifest.upsert(
+        ManifestEntry(accession=accessions[0], form_type="10-Q", cik="0001000045", date_filed="2024-01-02", strategy="index_tar")
+    )
+    manifest.close()
+    corrupt = data_dir / "filings_tar" / "10-Q" / "0001000045" / f"{accessions[0]}.tar"
+    corrupt.parent.mkdir(parents=True)
+    corrupt.write_bytes(b"not a tar")
+
+    monkeypatch.setattr(
+        dl_mod.SecClient,
+        "from_env",
+        classmethod(lambda cls, *, user_agent=None, data_dir=None: DummyClient(master_idx_text=master_idx, listing=listing, file_bytes=file_bytes)),
+    )
+    res = download_quarter_tar(
+        year=2024, quarter=1, forms=["10-Q"], data_dir=data_dir, file_types=[".xml"], tar_provider="local", show_progress=False
+    )
+    assert [(r.accession, r.status) for r in res] == [(accessions[0], "error"), (accessions[1], "downloaded")]